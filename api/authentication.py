@@ -0,0 +1,128 @@
+import time
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.translation import ugettext as _
+from rest_framework import authentication, exceptions
+from rest_framework.authtoken.models import Token
+from rest_framework_jwt import authentication as jwt_authentication
+
+
+AUTH_CACHE_ALIAS = 'api_auth'
+
+
+class PrincipalCache(object):
+    # A two-tier cache of authenticated users, with a short lived process-local tier in front of redis.
+    # Invalidation clears both tiers in the current process, and the redis tier for all processes;
+    # the local tiers of other processes may serve a changed user for up to their timeout.
+    # Only the fields needed for authorization are cached (and no credentials), and the users built
+    # from them are unsaved instances, with the other fields empty, which must not be saved.
+
+    principal_fields = ('pk', 'username', 'is_active', 'is_staff')
+
+    max_local_entries = 10000
+
+    def __init__(self, cache, local_timeout):
+        self.cache = cache
+        self.local_timeout = local_timeout
+
+        self.local = {}
+
+    @staticmethod
+    def get_key(kind, ident):
+        return 'auth:%s:%s' % (kind, hashlib.sha256(ident.encode('utf-8')).hexdigest())
+
+    def get(self, kind, ident):
+        key = self.get_key(kind, ident)
+        now = time.monotonic()
+
+        entry = self.local.get(key)
+        if entry is not None and entry[0] > now:
+            principal = entry[1]
+        else:
+            principal = self.cache.get(key)
+            if principal is None:
+                return None
+
+            self.set_local(key, principal, now)
+
+        return get_user_model()(**dict(zip(self.principal_fields, principal)))
+
+    def set_local(self, key, principal, now):
+        if len(self.local) >= self.max_local_entries:
+            self.local.clear()
+
+        self.local[key] = (now + self.local_timeout, principal)
+
+    def set(self, kind, ident, user):
+        key = self.get_key(kind, ident)
+        principal = tuple(getattr(user, name) for name in self.principal_fields)
+
+        self.cache.set(key, principal)
+        self.set_local(key, principal, time.monotonic())
+
+    def delete(self, kind, ident):
+        key = self.get_key(kind, ident)
+
+        self.cache.delete(key)
+        self.local.pop(key, None)
+
+
+principal_cache = PrincipalCache(caches[AUTH_CACHE_ALIAS], settings.API_AUTH_LOCAL_CACHE_TIMEOUT)
+
+
+class TokenAuthentication(authentication.TokenAuthentication):
+    def authenticate_credentials(self, key):
+        user = principal_cache.get('token', key)
+
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+
+            principal_cache.set('token', key, user)
+
+            return user, token
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return user, self.get_model()(key=key, user=user)
+
+
+class JSONWebTokenAuthentication(jwt_authentication.JSONWebTokenAuthentication):
+    # the signature and expiration of the token are verified before the user is resolved by its username
+
+    def authenticate_credentials(self, payload):
+        username = jwt_authentication.jwt_get_username_from_payload(payload)
+
+        user = principal_cache.get('user', username) if username else None
+
+        if user is None:
+            user = super().authenticate_credentials(payload)
+
+            principal_cache.set('user', username, user)
+
+            return user
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User account is disabled.'))
+
+        return user
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user(sender, instance, **kwargs):
+    principal_cache.delete('user', instance.get_username())
+
+    for key in Token.objects.filter(user_id=instance.pk).values_list('key', flat=True):
+        principal_cache.delete('token', key)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    principal_cache.delete('token', instance.key)
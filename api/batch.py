@@ -0,0 +1,299 @@
+import uuid
+from collections import OrderedDict, Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import dateparse
+from rest_framework import decorators, exceptions, response, status
+from rest_offlinesync.sync import ConflictError
+
+
+BATCH_ACTIONS = ('create', 'update', 'partial_update', 'destroy')
+
+
+class BatchItem(object):
+    def __init__(self, index, action, ext_id=None, at=None, data=None):
+        self.index = index
+        self.action = action
+        self.ext_id = ext_id
+        self.at = at
+        self.data = data
+
+        self.instance = None
+        self.serializer = None
+        self.parent_key = None
+
+        self.error = None
+
+
+class BatchModelMixin(object):
+    # Applies a list of create, update and delete actions to a collection in one request and one transaction.
+    # Each item is validated and conflict checked on its own, and the response reports the outcome of each item.
+    # Object limits are checked once for the whole batch, against the counters of CountedModelMixin,
+    # and deletions are written with a single update.
+
+    max_batch_size = settings.API_MAX_BATCH_SIZE
+
+    def _get_batch_timestamp(self, value):
+        if value is None:
+            return None
+
+        timestamp = dateparse.parse_datetime(value) if isinstance(value, str) else None
+
+        if timestamp is None:
+            raise exceptions.ValidationError({self.at_param: 'invalid timestamp format'})
+        if timestamp.tzinfo is None:
+            raise exceptions.ValidationError({self.at_param: 'timestamp without timezone'})
+
+        return timestamp
+
+    def _parse_batch_item(self, index, data):
+        if not isinstance(data, dict):
+            raise exceptions.ValidationError({'non_field_errors': ['expected an object']})
+
+        action = data.get('action')
+        if action not in BATCH_ACTIONS:
+            raise exceptions.ValidationError({'action': 'invalid action'})
+
+        item = BatchItem(index, action)
+
+        if action != 'create':
+            try:
+                item.ext_id = uuid.UUID(hex=data.get('id'))
+            except (TypeError, ValueError):
+                raise exceptions.NotFound()
+
+            item.at = self._get_batch_timestamp(data.get(self.at_param))
+
+        if action != 'destroy':
+            item.data = data.get('data')
+            if not isinstance(item.data, dict):
+                raise exceptions.ValidationError({'data': 'expected an object'})
+
+        return item
+
+    def get_batch_items(self, request):
+        data = request.data
+
+        if not isinstance(data, list):
+            raise exceptions.ValidationError({'non_field_errors': ['expected a list of items']})
+        if len(data) > self.max_batch_size:
+            raise exceptions.ValidationError({'non_field_errors': ['exceeded limit of %d items per batch' %
+                                                                   self.max_batch_size]})
+
+        items = []
+        ext_ids = set()
+
+        for index, item_data in enumerate(data):
+            try:
+                item = self._parse_batch_item(index, item_data)
+
+                if item.ext_id is not None:
+                    if item.ext_id in ext_ids:
+                        raise exceptions.ValidationError({'id': 'duplicate item'})
+
+                    ext_ids.add(item.ext_id)
+
+            except exceptions.APIException as exc:
+                item = BatchItem(index, None)
+                item.error = exc
+
+            items.append(item)
+
+        return items
+
+    def _init_batch_instances(self, items):
+        ext_ids = [item.ext_id for item in items if item.ext_id is not None and not item.error]
+        if not ext_ids:
+            return
+
+        instances = {instance.ext_id: instance for instance in self.get_queryset().filter(ext_id__in=ext_ids)}
+
+        for item in items:
+            if item.ext_id is None or item.error:
+                continue
+
+            item.instance = instances.get(item.ext_id)
+
+            if item.instance is None:
+                item.error = exceptions.NotFound()
+            elif item.at and item.instance.updated != item.at:
+                item.error = ConflictError()
+            else:
+                item.parent_key = getattr(item.instance, self.parent_key_filter)
+
+    def prefetch_batch_data(self, items_data):
+        pass
+
+    def _validate_batch_items(self, items, parent):
+        parent_name = self.get_parent_name()
+
+        self.prefetch_batch_data([item.data for item in items if not item.error and item.data is not None])
+
+        for item in items:
+            if item.error or item.action == 'destroy':
+                continue
+
+            partial = item.action == 'partial_update'
+            item.serializer = self.get_serializer(item.instance, data=item.data, partial=partial)
+
+            if not item.serializer.is_valid():
+                item.error = exceptions.ValidationError(item.serializer.errors)
+                continue
+
+            if self.is_aggregate():
+                item_parent = item.serializer.validated_data.get(parent_name)
+                if item_parent is not None:
+                    item.parent_key = self.get_parent_key(item_parent)
+
+            elif item.action == 'create':
+                item.parent_key = self.get_parent_key(parent)
+
+    def _lock_batch_parents(self, items):
+        parent_name = self.get_parent_name()
+
+        parents = {item.serializer.validated_data[parent_name].pk
+                   for item in items if not item.error and item.serializer and
+                   parent_name in item.serializer.validated_data}
+        if not parents:
+            return
+
+        locked = set(self.parent_model.objects.select_for_update().filter(pk__in=parents).values_list('pk', flat=True))
+
+        for item in items:
+            if item.error or not item.serializer or parent_name not in item.serializer.validated_data:
+                continue
+
+            if item.serializer.validated_data[parent_name].pk not in locked:
+                item.error = exceptions.APIException({parent_name: "object no longer exists"})
+
+    def _get_batch_deltas(self, items):
+        added = Counter()
+        removed = Counter()
+
+        for item in items:
+            if item.error or item.parent_key is None:
+                continue
+
+            if item.action == 'create':
+                added[item.parent_key] += 1
+            elif item.action == 'destroy':
+                removed[item.parent_key] += 1
+            elif getattr(item.instance, self.parent_key_filter) != item.parent_key:
+                added[item.parent_key] += 1
+                removed[getattr(item.instance, self.parent_key_filter)] += 1
+
+        return added, removed
+
+    def _check_batch_limits(self, items):
+        added, removed = self._get_batch_deltas(items)
+        if not added:
+            return
+
+        counts = self.lock_counts(added)
+
+        limit = self.get_limit(False)
+        if not limit:
+            return
+
+        exceeded = {key for key in added if counts[key] - removed[key] + added[key] > limit}
+        if not exceeded:
+            return
+
+        error = self.get_limit_error(limit)
+
+        for item in items:
+            if item.error or item.action == 'destroy' or item.parent_key not in exceeded:
+                continue
+
+            if item.action == 'create' or getattr(item.instance, self.parent_key_filter) != item.parent_key:
+                item.error = error
+
+    def _update_batch_counts(self, items):
+        added, removed = self._get_batch_deltas(items)
+
+        self.update_counts({key: added[key] - removed[key] for key in set(added) | set(removed)})
+
+    def _perform_batch_destroy(self, items):
+        instances = [item.instance for item in items if not item.error and item.action == 'destroy']
+        if not instances:
+            return
+
+        for instance in instances:
+            self._ensure_updated_past(instance)
+
+        self.delete_instances(instances)
+
+    def _perform_batch_update(self, items):
+        for item in items:
+            if item.error or item.action not in ('update', 'partial_update'):
+                continue
+
+            self._ensure_updated_past(item.instance)
+
+            item.serializer.save()
+
+    def _perform_batch_create(self, items, parent):
+        items = [item for item in items if not item.error and item.action == 'create']
+        if not items:
+            return
+
+        model = self.queryset.model
+
+        save_kwargs = {} if self.is_aggregate() else {self.get_parent_name(): parent}
+
+        instances = [model(**dict(item.serializer.validated_data, **save_kwargs)) for item in items]
+
+        for instance in instances:
+            if hasattr(instance, 'update_search_document'):
+                instance.update_search_document()
+
+        model.objects.bulk_create(instances)
+
+        for item, instance in zip(items, instances):
+            item.serializer.instance = instance
+
+    @staticmethod
+    def get_batch_result(item):
+        if item.error:
+            return OrderedDict((('status', item.error.status_code),
+                                ('detail', item.error.detail)))
+
+        if item.action == 'destroy':
+            return OrderedDict((('status', status.HTTP_204_NO_CONTENT),))
+
+        status_code = status.HTTP_201_CREATED if item.action == 'create' else status.HTTP_200_OK
+
+        return OrderedDict((('status', status_code),
+                            ('data', item.serializer.data)))
+
+    @decorators.list_route(methods=['post'], suffix='Batch')
+    @transaction.atomic(savepoint=False)
+    def batch(self, request, *args, **kwargs):
+        self.deleted_parent = None
+        self.isolated = True
+
+        items = self.get_batch_items(request)
+
+        if self.is_aggregate():
+            parent = None
+        else:
+            parent = self.get_parent(False, True)
+
+        self._init_batch_instances(items)
+        self._validate_batch_items(items, parent)
+
+        if self.is_aggregate():
+            self._lock_batch_parents(items)
+
+        self._check_batch_limits(items)
+
+        self._perform_batch_destroy(items)
+        self._perform_batch_update(items)
+        self._perform_batch_create(items, parent)
+
+        self._update_batch_counts(items)
+
+        results = [self.get_batch_result(item) for item in items]
+
+        return response.Response(OrderedDict(results=results))
@@ -0,0 +1,193 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework import renderers
+
+
+RESPONSE_CACHE_ALIAS = 'api_responses'
+
+
+# seconds between the additions of the statistics of a process to the shared ones
+STATS_FLUSH_INTERVAL = 10
+
+
+response_cache = caches[RESPONSE_CACHE_ALIAS]
+
+
+def add_stat(name, delta):
+    key = 'stats:' + name
+
+    try:
+        response_cache.incr(key, delta)
+    except ValueError:
+        if not response_cache.add(key, delta, timeout=None):
+            response_cache.incr(key, delta)
+
+
+class PendingStats(object):
+    # The statistics counted in this process, which are added to the shared ones in redis
+    # at most once per flush interval, instead of adding round trips to every cache lookup.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+        self.deltas = defaultdict(int)
+        self.flushed = time.monotonic()
+
+    def take(self):
+        with self.lock:
+            deltas = self.deltas
+            self.deltas = defaultdict(int)
+            self.flushed = time.monotonic()
+
+        return deltas
+
+    def add(self, name, delta):
+        with self.lock:
+            self.deltas[name] += delta
+            due = time.monotonic() - self.flushed >= STATS_FLUSH_INTERVAL
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        for name, delta in self.take().items():
+            if delta:
+                add_stat(name, delta)
+
+
+pending_stats = PendingStats()
+
+
+def count(name, delta=1):
+    pending_stats.add(name, delta)
+
+
+def get_stats():
+    # the statistics of the other processes are up to one flush interval old
+    pending_stats.flush()
+
+    names = ('hits', 'misses', 'invalidations', 'fills', 'fill_time_ms')
+    values = response_cache.get_many(['stats:' + name for name in names])
+
+    stats = OrderedDict((name, values.get('stats:' + name, 0)) for name in names)
+
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else None
+    stats['fill_time_avg_ms'] = stats['fill_time_ms'] / stats['fills'] if stats['fills'] else None
+
+    return stats
+
+
+def get_generation_key(username):
+    return 'gen:' + username
+
+
+def get_generation(username):
+    key = get_generation_key(username)
+
+    generation = response_cache.get(key)
+
+    if generation is None:
+        # starts from the current time, so that an evicted generation does not revive older entries
+        response_cache.add(key, int(time.time() * 1000), timeout=None)
+        generation = response_cache.get(key)
+
+    return generation
+
+
+def bump_generation(username):
+    key = get_generation_key(username)
+
+    try:
+        response_cache.incr(key)
+    except ValueError:
+        response_cache.add(key, int(time.time() * 1000), timeout=None)
+
+    count('invalidations')
+
+
+class ResponseCacheMixin(object):
+    # Caches the rendered JSON list and search responses of a user's collections, when enabled with
+    # the API_RESPONSE_CACHE setting. Entries are keyed by the user's generation, which is bumped
+    # after every committed write through the API, so stale entries are never read and simply expire.
+    # Writes made outside of the API (e.g. in the admin site) are visible only after the entries expire.
+
+    cached_actions = ('list', 'search')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.cache_key = None
+        self.cache_fill_start = None
+
+    def get_cache_owner(self):
+        return self.kwargs['user_username']
+
+    def is_cached(self, request):
+        return settings.API_RESPONSE_CACHE and \
+               request.method == 'GET' and \
+               self.action in self.cached_actions and \
+               isinstance(getattr(request, 'accepted_renderer', None), renderers.JSONRenderer) and \
+               self.stream_param not in request.query_params
+
+    def get_cache_key(self, request):
+        query = sorted(request.query_params.lists())
+
+        variant = (type(self).__name__, self.action, request.build_absolute_uri(request.path), query,
+                   request.accepted_media_type)
+
+        digest = hashlib.sha1(repr(variant).encode('utf-8')).hexdigest()
+
+        owner = self.get_cache_owner()
+
+        return 'resp:%s:%d:%s' % (owner, get_generation(owner), digest)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        if self.is_cached(request):
+            self.cache_key = self.get_cache_key(request)
+
+    def list(self, request, *args, **kwargs):
+        if self.cache_key is not None:
+            entry = response_cache.get(self.cache_key)
+
+            if entry is not None:
+                count('hits')
+
+                status_code, content_type, etag, content = entry
+
+                if etag is not None:
+                    self.check_conditions(etag)
+
+                return HttpResponse(content, content_type=content_type, status=status_code)
+
+            count('misses')
+            self.cache_fill_start = time.perf_counter()
+
+        return super().list(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if self.cache_fill_start is not None and response.status_code == 200 and not response.streaming:
+            response.render()
+
+            entry = (response.status_code, response['Content-Type'], response.get('ETag'), response.content)
+            response_cache.set(self.cache_key, entry)
+
+            count('fills')
+            count('fill_time_ms', int((time.perf_counter() - self.cache_fill_start) * 1000))
+
+        if settings.API_RESPONSE_CACHE and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            owner = self.get_cache_owner()
+            transaction.on_commit(lambda: bump_generation(owner))
+
+        return response
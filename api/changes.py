@@ -0,0 +1,209 @@
+import datetime
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone, dateparse
+from rest_framework import viewsets, response, status, exceptions
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from rest_offlinesync.sync import SyncedModelMixin
+
+from .models import SearchDocumentModel, Notebook, Note, Task, NotebookTombstone, NoteTombstone, TaskTombstone
+from .pagination import encode_token, decode_token, encode_value
+from .rest import serializers, links
+from .streaming import snapshot
+from . import permissions
+
+
+Collection = namedtuple('Collection', ('name', 'model', 'object_filters', 'filters',
+                                       'serializer_class', 'hyperlinked_serializer_class'))
+
+
+class ChangesViewSet(viewsets.GenericViewSet):
+    # Lists the changes to all of a user's collections since a given time, ordered by (updated, collection, id).
+    # Pages are selected with keyset conditions on each collection. The upper bound of the changes (until)
+    # is fixed by the first page and carried in the cursor, so that all pages describe the same interval.
+    # The client should use it as the lower bound (since) of its next sync.
+
+    view_name = 'Changes'
+    permission_classes = permissions.nested_permissions
+    pagination_class = None
+
+    since_param = SyncedModelMixin.since_param
+    until_param = SyncedModelMixin.until_param
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    collections = (
+        Collection('notebook', Notebook, {'user_id': 'user_username'}, {},
+                   serializers.NotebookSerializer, links.HyperlinkedNotebookSerializer),
+        Collection('note', Note, {'notebook__user_id': 'user_username'}, {'notebook__deleted': False},
+                   serializers.NoteSerializer, links.HyperlinkedNoteSerializer),
+        Collection('task', Task, {'user_id': 'user_username'}, {},
+                   serializers.TaskSerializer, links.HyperlinkedTaskSerializer),
+    )
+
+    # deletions are also read from the tombstones, when enabled
+    tombstone_collections = (
+        Collection('notebook', NotebookTombstone, {'user_id': 'user_username'}, {},
+                   serializers.NotebookTombstoneSerializer, None),
+        Collection('note', NoteTombstone, {'user_id': 'user_username'}, {},
+                   serializers.NoteTombstoneSerializer, None),
+        Collection('task', TaskTombstone, {'user_id': 'user_username'}, {},
+                   serializers.TaskTombstoneSerializer, None),
+    )
+
+    def get_view_name(self):
+        return self.view_name
+
+    def get_collections(self):
+        if settings.API_TOMBSTONES:
+            return self.collections + self.tombstone_collections
+
+        return self.collections
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+
+        context['user_username'] = self.kwargs['user_username']
+
+        return context
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            cursor = decode_token(encoded)
+
+            until = dateparse.parse_datetime(cursor['u'])
+            updated = dateparse.parse_datetime(cursor['v'][0])
+            index = int(cursor['v'][1])
+            pk = int(cursor['v'][2])
+
+            if until is None or updated is None or not 0 <= index < len(self.get_collections()):
+                raise ValueError()
+
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise exceptions.NotFound('invalid cursor')
+
+        return until, (updated, index, pk)
+
+    def encode_cursor(self, request, until, position):
+        updated, index, pk = position
+
+        cursor = OrderedDict((('u', encode_value(until)),
+                              ('v', [encode_value(updated), index, pk])))
+
+        return replace_query_param(request.build_absolute_uri(), self.cursor_query_param, encode_token(cursor))
+
+    def get_collection_queryset(self, index, since, until, position):
+        collection = self.get_collections()[index]
+
+        filter_kwargs = {expr: self.kwargs[kwarg] for expr, kwarg in collection.object_filters.items()}
+        filter_kwargs.update(collection.filters)
+
+        queryset = collection.model.objects.filter(**filter_kwargs)
+        if issubclass(collection.model, SearchDocumentModel):
+            queryset = queryset.defer('search_document')
+
+        if since is not None:
+            queryset = queryset.filter(updated__gte=since)
+        queryset = queryset.filter(updated__lt=until)
+
+        if position is not None:
+            updated, position_index, pk = position
+
+            if index < position_index:
+                queryset = queryset.filter(updated__gt=updated)
+            elif index == position_index:
+                queryset = queryset.filter(Q(updated__gt=updated) | Q(updated=updated, pk__gt=pk))
+            else:
+                queryset = queryset.filter(updated__gte=updated)
+
+        return queryset.order_by('updated', 'pk')
+
+    def serialize_changes(self, changes):
+        context = self.get_serializer_context()
+
+        results = [None] * len(changes)
+
+        for index, collection in enumerate(self.get_collections()):
+            for deleted in (False, True):
+                positions = [i for (i, (obj_index, obj)) in enumerate(changes)
+                             if obj_index == index and obj.deleted == deleted]
+                if not positions:
+                    continue
+
+                serializer_class = collection.serializer_class if deleted else collection.hyperlinked_serializer_class
+                serializer = serializer_class([changes[i][1] for i in positions], many=True, context=context)
+
+                for i, data in zip(positions, serializer.data):
+                    results[i] = OrderedDict((('type', collection.name),
+                                              ('deleted', deleted),
+                                              ('data', data)))
+
+        return results
+
+    def is_expired(self, since):
+        expiry_days = getattr(settings, 'REST_OFFLINESYNC', None) and settings.REST_OFFLINESYNC.get('DELETED_EXPIRY_DAYS')
+        if not expiry_days or since is None:
+            return False
+
+        return since < (timezone.now() - datetime.timedelta(expiry_days))
+
+    def list(self, request, *args, **kwargs):
+        since = SyncedModelMixin.get_timestamp(request, self.since_param)
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            until, position = cursor
+        else:
+            until = SyncedModelMixin.get_timestamp(request, self.until_param, timezone.now())
+            position = None
+
+        page_size = self.get_page_size(request)
+
+        # the collections are read from one snapshot, so that an object which is deleted (or whose notebook is)
+        # between the reads is listed consistently, e.g. not both as a live object and as a tombstone
+        changes = []
+        with snapshot():
+            for index in range(len(self.get_collections())):
+                queryset = self.get_collection_queryset(index, since, until, position)
+                changes.extend((index, obj) for obj in queryset[:page_size + 1])
+
+        changes.sort(key=lambda change: (change[1].updated, change[0], change[1].pk))
+
+        has_next = len(changes) > page_size
+        changes = changes[:page_size]
+
+        if has_next:
+            index, obj = changes[-1]
+            next_link = self.encode_cursor(request, until, (obj.updated, index, obj.pk))
+        else:
+            next_link = None
+
+        data = OrderedDict(((self.since_param, since),
+                            (self.until_param, until),
+                            ('next', next_link),
+                            ('results', self.serialize_changes(changes))))
+
+        # deleted objects older than the expiry period may have been purged
+        status_code = status.HTTP_206_PARTIAL_CONTENT if self.is_expired(since) else status.HTTP_200_OK
+
+        return response.Response(data, status=status_code)
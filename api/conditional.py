@@ -0,0 +1,89 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def get_etag(*values):
+    # weak, because the sync bounds of list representations (since, until) are not part of the validator
+    return 'W/' + quote_etag(hashlib.sha1(repr(values).encode('utf-8')).hexdigest())
+
+
+class ConditionalResponse(Exception):
+    def __init__(self, response):
+        super().__init__()
+
+        self.response = response
+
+
+class ConditionalGetMixin(object):
+    # Answers conditional list and retrieve requests with 304 (not modified) before serialization.
+    # The ETag of an object is derived from its updated timestamp, and that of a list page from the keys
+    # and updated timestamps of its rows, and from the rest of the paginated response (count and links).
+    # There is no Last-Modified, whose one second resolution would hide the changes made in the same second.
+    # Streamed pages have no validators, because their rows are read only while the response is written.
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.etag = None
+
+    def get_validator_values(self, *values):
+        request = self.request
+
+        return (request.build_absolute_uri(), getattr(request, 'accepted_media_type', None)) + values
+
+    def check_conditions(self, etag):
+        self.etag = etag
+
+        response = get_conditional_response(self.request._request, etag=etag)
+        if response is not None:
+            raise ConditionalResponse(response)
+
+    def get_object(self):
+        obj = super().get_object()
+
+        if self.action == 'retrieve' and self.request.method in SAFE_METHODS:
+            updated = obj['updated'] if isinstance(obj, dict) else obj.updated
+
+            self.check_conditions(get_etag(*self.get_validator_values(updated)))
+
+        return obj
+
+    def get_page_validator_values(self, page):
+        rows = tuple((row['id'], row['updated']) if isinstance(row, dict) else (row.pk, row.updated) for row in page)
+
+        # the envelope of the paginated response, without the results
+        envelope = tuple(self.paginator.get_paginated_response([]).data.items())
+
+        return rows, envelope
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+
+        if page is not None and self.request.method in SAFE_METHODS and not getattr(self, 'streaming', False):
+            self.check_conditions(get_etag(*self.get_validator_values(*self.get_page_validator_values(page))))
+
+        return page
+
+    def handle_exception(self, exc):
+        if isinstance(exc, ConditionalResponse):
+            return exc.response
+
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if self.etag is not None and (200 <= response.status_code < 300 or response.status_code == 304):
+            response['ETag'] = self.etag
+
+        if self.etag is not None:
+            # clients and private caches must revalidate, and the representations vary with the accepted type
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Accept',))
+
+        return response
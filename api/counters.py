@@ -0,0 +1,77 @@
+from django.db import transaction
+from django.db.models import F
+from rest_offlinesync.limit import LimitExceededError
+
+
+class CountedModelMixin(object):
+    # Enforces the object limits with per-parent counters of the live objects (see CountsModel),
+    # instead of counting the objects of the parent on every write. The counter rows are locked and read
+    # before checking a limit, and are adjusted in the same transaction as the objects they count.
+    # Missing counters are created from an actual count, and the reconcilecounts command repairs any drift.
+
+    counts_model = None
+    counts_field = None
+
+    def get_parent_key(self, parent):
+        field = self.queryset.model._meta.get_field(self.get_parent_name())
+
+        return getattr(parent, field.target_field.attname)
+
+    def lock_counts(self, keys):
+        # locks in key order, to avoid deadlocks between requests that lock the same counters
+        keys = sorted(set(keys))
+
+        queryset = self.counts_model.objects.select_for_update()
+
+        counts = {counts.pk: getattr(counts, self.counts_field)
+                  for counts in queryset.filter(pk__in=keys).order_by('pk')}
+
+        missing = [key for key in keys if key not in counts]
+        if missing:
+            for key, actual_counts in self.counts_model.get_actual_counts(missing).items():
+                obj, created = queryset.get_or_create(pk=key, defaults=actual_counts)
+                counts[key] = getattr(obj, self.counts_field)
+
+        return counts
+
+    def update_counts(self, deltas):
+        for key, delta in deltas.items():
+            if delta:
+                self.counts_model.objects.filter(pk=key).update(**{self.counts_field: F(self.counts_field) + delta})
+
+    def get_limit_error(self, limit):
+        object_type = self.queryset.model
+
+        return LimitExceededError('exceeded limit of %d %s per %s' %
+                                  (limit, object_type._meta.verbose_name_plural, self.parent_model._meta.verbose_name))
+
+    def _check_active_limits(self, parent):
+        key = self.get_parent_key(parent)
+
+        count = self.lock_counts([key])[key]
+
+        limit = self.get_limit(False)
+        if limit and count >= limit:
+            raise self.get_limit_error(limit)
+
+    @transaction.atomic(savepoint=False)
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+
+        self.update_counts({getattr(serializer.instance, self.parent_key_filter): 1})
+
+    @transaction.atomic(savepoint=False)
+    def perform_update(self, serializer):
+        old_key = getattr(serializer.instance, self.parent_key_filter)
+
+        super().perform_update(serializer)
+
+        new_key = getattr(serializer.instance, self.parent_key_filter)
+        if new_key != old_key:
+            self.update_counts({old_key: -1, new_key: 1})
+
+    @transaction.atomic(savepoint=False)
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+
+        self.update_counts({getattr(instance, self.parent_key_filter): -1})
@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+from rest_framework import viewsets
+
+from .models import Notebook, Note, Task
+from .rest import serializers
+from .streaming import StreamedList, StreamingJSONResponse
+from . import permissions
+
+
+class ExportViewSet(viewsets.GenericViewSet):
+    # Exports all live objects of a user in one streamed response, read from a consistent snapshot.
+    # The rows are fetched in chunks through server-side cursors, so memory use does not grow with the account size.
+
+    view_name = 'Export'
+    permission_classes = permissions.nested_permissions
+    pagination_class = None
+
+    # (name, model, object filters, filters, serializer class)
+    collections = (
+        ('notebooks', Notebook, {'user_id': 'user_username'}, {},
+         serializers.NotebookSerializer),
+        ('notes', Note, {'notebook__user_id': 'user_username'}, {'notebook__deleted': False},
+         serializers.NoteSerializer),
+        ('tasks', Task, {'user_id': 'user_username'}, {},
+         serializers.TaskSerializer),
+    )
+
+    def get_view_name(self):
+        return self.view_name
+
+    def list(self, request, *args, **kwargs):
+        context = self.get_serializer_context()
+
+        data = OrderedDict(user=self.kwargs['user_username'])
+
+        for name, model, object_filters, filters, serializer_class in self.collections:
+            filter_kwargs = {expr: self.kwargs[kwarg] for expr, kwarg in object_filters.items()}
+            filter_kwargs.update(filters)
+
+            queryset = model.objects.defer('search_document').filter(deleted=False, **filter_kwargs)
+            queryset = queryset.order_by('created', 'pk')
+
+            data[name] = StreamedList(queryset.iterator(), serializer_class(context=context))
+
+        return StreamingJSONResponse(data, snapshot=True)
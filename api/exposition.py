@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from prometheus_client import CONTENT_TYPE_LATEST
+from rest_framework import viewsets, mixins, permissions, renderers, response
+
+from .metrics import get_metrics
+
+
+class PrometheusRenderer(renderers.BaseRenderer):
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+
+        # errors, e.g. of denied requests
+        return str(data).encode(self.charset)
+
+
+class IsAdminOrMetricsScraper(permissions.BasePermission):
+    # scrapers authenticate with the bearer token in the API_METRICS_TOKEN setting
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+
+        token = settings.API_METRICS_TOKEN
+        if not token:
+            return False
+
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+
+        return constant_time_compare(authorization, 'Bearer ' + token)
+
+
+class MetricsViewSet(mixins.ListModelMixin,
+                     viewsets.GenericViewSet):
+    view_name = 'Metrics'
+    permission_classes = (IsAdminOrMetricsScraper,)
+    renderer_classes = (PrometheusRenderer,)
+    throttle_classes = ()
+
+    def get_view_name(self):
+        return self.view_name
+
+    def list(self, request, *args, **kwargs):
+        return response.Response(get_metrics(), content_type=CONTENT_TYPE_LATEST)
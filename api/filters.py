@@ -0,0 +1,40 @@
+import operator
+import functools
+
+from django.db.models import Lookup, Q, CharField, TextField
+from rest_fuzzysearch import search
+
+
+@CharField.register_lookup
+@TextField.register_lookup
+class TrigramWordSimilar(Lookup):
+    # uses the word similarity operator (term <% column), which is supported by gin_trgm_ops indexes
+    lookup_name = 'trigram_word_similar'
+
+    def as_sql(self, qn, connection):
+        lhs, lhs_params = self.process_lhs(qn, connection)
+        rhs, rhs_params = self.process_rhs(qn, connection)
+        params = tuple(rhs_params) + tuple(lhs_params)
+        return '%s <%%%% %s' % (rhs, lhs), params
+
+
+class TrigramSearchFilter(search.RankedFuzzySearchFilter):
+    # Narrows the results with an index-backed trigram match on each search field before ranking them,
+    # so that the similarity is only computed for the candidate rows.
+    # Word similarity is used instead of plain similarity, because the similarity of a short query
+    # to a long text is always close to zero.
+
+    @staticmethod
+    def prefilter_queryset(queryset, search_fields, search_terms):
+        conditions = (Q(**{field + '__' + TrigramWordSimilar.lookup_name: search_terms}) for field in search_fields)
+
+        return queryset.filter(functools.reduce(operator.or_, conditions))
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = getattr(view, 'search_fields', None)
+        search_terms = ' '.join(self.get_search_terms(request))
+
+        if search_fields and search_terms:
+            queryset = self.prefilter_queryset(queryset, search_fields, search_terms)
+
+        return super().filter_queryset(request, queryset, view)
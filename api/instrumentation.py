@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import random
+import threading
+import functools
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends import utils as db_utils
+from redis import client as redis_client
+from rest_framework import serializers, response as rest_response
+
+from .rest import compiled
+
+
+# the recorder of the current request; greenlet-local when the gevent workers have patched threading
+_local = threading.local()
+
+_install_lock = threading.Lock()
+
+# the replaced attributes, as (class, name, original), while installed
+_patches = []
+
+_write_lock = threading.Lock()
+
+
+class Recorder(object):
+    phases = ('db', 'cache', 'serialize', 'render')
+
+    def __init__(self):
+        self.durations = dict.fromkeys(self.phases, 0.0)
+        self.counts = dict.fromkeys(self.phases, 0)
+        self.active = set()
+
+    def get_server_timing(self, total):
+        metrics = ['%s;dur=%.1f;desc="%d calls"' % (phase, self.durations[phase] * 1000, self.counts[phase])
+                   for phase in self.phases if self.counts[phase]]
+        metrics.append('total;dur=%.1f' % (total * 1000))
+
+        return ', '.join(metrics)
+
+
+def timed(phase, func):
+    # nested calls of the same phase (e.g. nested serializers) are measured once, by the outermost call
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        recorder = getattr(_local, 'recorder', None)
+        if recorder is None or phase in recorder.active:
+            return func(*args, **kwargs)
+
+        recorder.active.add(phase)
+        start = time.perf_counter()
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            recorder.durations[phase] += time.perf_counter() - start
+            recorder.counts[phase] += 1
+            recorder.active.discard(phase)
+
+    return wrapper
+
+
+def patch_method(cls, name, phase):
+    method = cls.__dict__[name]
+    _patches.append((cls, name, method))
+
+    setattr(cls, name, timed(phase, method))
+
+
+def patch_property(cls, name, phase):
+    prop = cls.__dict__[name]
+    _patches.append((cls, name, prop))
+
+    setattr(cls, name, property(timed(phase, prop.fget), prop.fset, prop.fdel))
+
+
+def install():
+    # The wrappers cost one thread-local lookup per call when no request is recorded.
+    # Queries are timed at the cursor, cache calls at the redis client (including the throttle scripts),
+    # serialization at the data of the serializers, and rendering at the rendered content of the responses.
+    # The serialization and rendering of streamed lists happen after the response is returned, and are not recorded.
+
+    with _install_lock:
+        if _patches:
+            return
+
+        patch_method(db_utils.CursorWrapper, 'execute', 'db')
+        patch_method(db_utils.CursorWrapper, 'executemany', 'db')
+        patch_method(redis_client.StrictRedis, 'execute_command', 'cache')
+        patch_method(redis_client.BasePipeline, 'execute', 'cache')
+        patch_property(serializers.BaseSerializer, 'data', 'serialize')
+        patch_property(compiled.CompiledSerializer, 'data', 'serialize')
+        patch_property(rest_response.Response, 'rendered_content', 'render')
+
+
+def uninstall():
+    # restores the patched attributes, e.g. after tests
+
+    with _install_lock:
+        while _patches:
+            cls, name, original = _patches.pop()
+            setattr(cls, name, original)
+
+
+class InstrumentationMiddleware(object):
+    # Records where the time of a request is spent, in a Server-Timing header when API_SERVER_TIMING is enabled,
+    # and in JSON lines appended to API_INSTRUMENTATION_LOG for a sample of API_INSTRUMENTATION_SAMPLE_RATE requests.
+    # When both are off, the middleware removes itself and nothing is patched.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        self.server_timing = settings.API_SERVER_TIMING
+        self.sample_rate = settings.API_INSTRUMENTATION_SAMPLE_RATE
+        self.log_path = settings.API_INSTRUMENTATION_LOG
+
+        if not self.server_timing and not self.sample_rate:
+            raise MiddlewareNotUsed()
+
+        install()
+
+    def __call__(self, request):
+        sampled = self.sample_rate and random.random() < self.sample_rate
+
+        if not sampled and not self.server_timing:
+            return self.get_response(request)
+
+        recorder = Recorder()
+        _local.recorder = recorder
+        start = time.perf_counter()
+
+        try:
+            response = self.get_response(request)
+        finally:
+            _local.recorder = None
+
+        total = time.perf_counter() - start
+
+        if self.server_timing:
+            response['Server-Timing'] = recorder.get_server_timing(total)
+
+        if sampled:
+            self.write_record(self.get_record(request, response, recorder, total))
+
+        return response
+
+    def get_record(self, request, response, recorder, total):
+        match = request.resolver_match
+        actions = getattr(match.func, 'actions', None) if match else None
+
+        record = OrderedDict((
+            ('time', round(time.time(), 3)),
+            ('method', request.method),
+            ('view', match.view_name if match else None),
+            ('action', actions.get(request.method.lower()) if actions else None),
+            ('status', response.status_code),
+            ('streaming', response.streaming),
+            ('pid', os.getpid()),
+            ('total_ms', round(total * 1000, 3)),
+        ))
+
+        for phase in recorder.phases:
+            record[phase + '_calls'] = recorder.counts[phase]
+            record[phase + '_ms'] = round(recorder.durations[phase] * 1000, 3)
+
+        return record
+
+    def write_record(self, record):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+
+        with _write_lock:
+            with open(self.log_path, 'a') as log:
+                log.write(line)
@@ -0,0 +1,157 @@
+import time
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.models import Notebook, Note, Task, NotebookCounts, Tombstone, NotebookTombstone, NoteTombstone, TaskTombstone
+
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_SLEEP = 0.1
+
+
+def quote(name):
+    return connection.ops.quote_name(name)
+
+
+class Command(BaseCommand):
+    help = 'Purges the deleted objects which have expired, in batches of the oldest ones first. ' \
+           'An interrupted purge resumes where it stopped when run again.'
+
+    # purged model, children which are purged with each object: (child model, parent key column, parent key field)
+    purged = (
+        (Notebook, ((Note, 'notebook_id', 'ext_id'), (NoteTombstone, 'notebook_id', 'ext_id'),
+                    (NotebookCounts, 'notebook_id', 'ext_id'))),
+        (Note, ()),
+        (Task, ()),
+        (NotebookTombstone, ()),
+        (NoteTombstone, ()),
+        (TaskTombstone, ()),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='number of rows deleted per transaction')
+        parser.add_argument('--sleep', type=float, default=DEFAULT_SLEEP,
+                            help='seconds to sleep between batches')
+        parser.add_argument('--time-limit', type=float, default=None,
+                            help='seconds after which to stop, leaving the rest to the next run')
+
+    def handle(self, *args, **options):
+        expiry_days = settings.REST_OFFLINESYNC.get('DELETED_EXPIRY_DAYS')
+        if not expiry_days:
+            return
+
+        self.batch_size = options['batch_size']
+        self.sleep = options['sleep']
+        self.deadline = time.monotonic() + options['time_limit'] if options['time_limit'] else None
+
+        threshold = timezone.now() - datetime.timedelta(days=expiry_days)
+
+        for model, children in self.purged:
+            if children:
+                self.purge_parents(model, children, threshold)
+            else:
+                self.purge(model, threshold)
+
+            if self.is_expired():
+                self.stdout.write('time limit reached, stopping')
+                break
+
+    def is_expired(self):
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def pause(self):
+        if self.sleep:
+            time.sleep(self.sleep)
+
+    def report(self, model, total, updated):
+        self.stdout.write('%s: %d purged, up to %s' % (model._meta.label, total, updated.isoformat()))
+
+    def purge(self, model, threshold):
+        # Each batch is one statement, which deletes the oldest expired rows, as found by the partial index
+        # of deleted rows by update time (or the index of all tombstones by update time).
+        # The rows locked by concurrent requests are left to a later batch.
+        table = quote(model._meta.db_table)
+        condition = 'updated < %s' if issubclass(model, Tombstone) else 'deleted AND updated < %s'
+        sql = 'DELETE FROM {table} WHERE id IN (' \
+              'SELECT id FROM {table} WHERE {condition} ORDER BY updated, id LIMIT %s ' \
+              'FOR UPDATE SKIP LOCKED) RETURNING updated'.format(table=table, condition=condition)
+
+        total = 0
+
+        while not self.is_expired():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [threshold, self.batch_size])
+                updated = [row[0] for row in cursor.fetchall()]
+
+            if not updated:
+                break
+
+            total += len(updated)
+            self.report(model, total, max(updated))
+
+            self.pause()
+
+        self.stdout.write('%s: done, %d purged' % (model._meta.label, total))
+
+    def purge_parents(self, model, children, threshold):
+        # The children of a batch of expired parents are purged first, in batches of their own,
+        # and then the parents. If interrupted, the parents remain, and their purge resumes on the next run.
+        table = quote(model._meta.db_table)
+
+        select_sql = 'SELECT id FROM {table} WHERE deleted AND updated < %s ORDER BY updated, id LIMIT %s'.format(
+            table=table)
+        delete_sql = 'DELETE FROM {table} WHERE id = ANY(%s) AND deleted AND updated < %s RETURNING updated'.format(
+            table=table)
+
+        total = 0
+
+        while not self.is_expired():
+            with connection.cursor() as cursor:
+                cursor.execute(select_sql, [threshold, self.batch_size])
+                ids = [row[0] for row in cursor.fetchall()]
+
+            if not ids:
+                break
+
+            for child_model, column, key_field in children:
+                if not self.purge_children(model, ids, child_model, column, key_field):
+                    return
+
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(delete_sql, [ids, threshold])
+                updated = [row[0] for row in cursor.fetchall()]
+
+            total += len(updated)
+            if updated:
+                self.report(model, total, max(updated))
+
+            self.pause()
+
+        self.stdout.write('%s: done, %d purged' % (model._meta.label, total))
+
+    def purge_children(self, model, ids, child_model, column, key_field):
+        child_table = quote(child_model._meta.db_table)
+        pk_column = quote(child_model._meta.pk.column)
+
+        sql = 'DELETE FROM {child_table} WHERE {pk} IN (' \
+              'SELECT {pk} FROM {child_table} WHERE {column} IN (SELECT {key} FROM {table} WHERE id = ANY(%s)) ' \
+              'LIMIT %s)'.format(child_table=child_table, pk=pk_column, column=quote(column),
+                                 key=quote(model._meta.get_field(key_field).column), table=quote(model._meta.db_table))
+
+        while True:
+            if self.is_expired():
+                return False
+
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [ids, self.batch_size])
+                deleted = cursor.rowcount
+
+            if deleted < self.batch_size:
+                return True
+
+            self.pause()
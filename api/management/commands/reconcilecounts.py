@@ -0,0 +1,77 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Notebook, UserCounts, NotebookCounts
+
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_SLEEP = 0.1
+
+
+class Command(BaseCommand):
+    help = 'Creates missing object counters and corrects the counters which differ from the actual counts.'
+
+    # counts model, parent model, parent key field
+    counters = (
+        (UserCounts, User, 'username'),
+        (NotebookCounts, Notebook, 'ext_id'),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='number of parents reconciled per transaction')
+        parser.add_argument('--sleep', type=float, default=DEFAULT_SLEEP,
+                            help='seconds to sleep between batches')
+
+    @staticmethod
+    @transaction.atomic
+    def reconcile_batch(counts_model, parent_model, key_field, last_pk, batch_size):
+        parents = parent_model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', key_field)
+        parents = list(parents[:batch_size])
+        if not parents:
+            return None, 0
+
+        keys = [key for (pk, key) in parents]
+
+        # writes lock their counters before changing the counted objects,
+        # so the actual counts cannot change while the counters are locked
+        existing = {counts.pk: counts for counts in
+                    counts_model.objects.select_for_update().filter(pk__in=keys).order_by('pk')}
+
+        fixed = 0
+
+        for key, actual_counts in counts_model.get_actual_counts(keys).items():
+            counts = existing.get(key)
+
+            if counts is None:
+                counts, created = counts_model.objects.get_or_create(pk=key, defaults=actual_counts)
+                fixed += created
+
+            elif any(getattr(counts, field) != count for field, count in actual_counts.items()):
+                counts_model.objects.filter(pk=key).update(**actual_counts)
+                fixed += 1
+
+        return parents[-1][0], fixed
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        sleep = options['sleep']
+
+        for counts_model, parent_model, key_field in self.counters:
+            last_pk = 0
+            total = 0
+
+            while True:
+                last_pk, fixed = self.reconcile_batch(counts_model, parent_model, key_field, last_pk, batch_size)
+                if last_pk is None:
+                    break
+
+                total += fixed
+
+                if sleep:
+                    time.sleep(sleep)
+
+            self.stdout.write('%s: done, %d reconciled' % (counts_model._meta.label, total))
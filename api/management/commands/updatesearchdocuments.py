@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+
+from api.models import Notebook, Note, Task
+
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_SLEEP = 0.1
+
+
+class Command(BaseCommand):
+    help = 'Fills in the search documents of notebooks, notes and tasks in batches.'
+
+    models = (Notebook, Note, Task)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', dest='all',
+                            help='recompute all search documents, not only the missing ones')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='number of rows updated per transaction')
+        parser.add_argument('--sleep', type=float, default=DEFAULT_SLEEP,
+                            help='seconds to sleep between batches')
+
+    @staticmethod
+    @transaction.atomic
+    def update_batch(model, last_pk, batch_size, update_all):
+        queryset = model.objects.filter(pk__gt=last_pk)
+        if not update_all:
+            queryset = queryset.filter(search_document__isnull=True)
+
+        # lock the batch, so that concurrent writes do not get overwritten with stale documents
+        batch = queryset.select_for_update().order_by('pk').only('pk', *model.search_document_fields)[:batch_size]
+        batch = list(batch)
+
+        if batch:
+            for obj in batch:
+                obj.update_search_document()
+
+            # the batch is written with one statement, which selects the document of each row by its key;
+            # update() does not touch the updated timestamps, which would otherwise trigger client syncs
+            documents = models.Case(*[models.When(pk=obj.pk, then=models.Value(obj.search_document))
+                                      for obj in batch],
+                                    output_field=models.TextField())
+            model.objects.filter(pk__in=[obj.pk for obj in batch]).update(search_document=documents)
+
+        return batch[-1].pk if batch else None, len(batch)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        sleep = options['sleep']
+        update_all = options['all']
+
+        for model in self.models:
+            last_pk = 0
+            total = 0
+
+            while True:
+                last_pk, count = self.update_batch(model, last_pk, batch_size, update_all)
+                if last_pk is None:
+                    break
+
+                total += count
+                self.stdout.write('%s: %d' % (model._meta.label, total))
+
+                if sleep:
+                    time.sleep(sleep)
+
+            self.stdout.write('%s: done, %d updated' % (model._meta.label, total))
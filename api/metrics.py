@@ -0,0 +1,103 @@
+import os
+import time
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+
+
+# This module is imported by the throttle classes, which rest_framework loads while its views are being defined,
+# so it must not import rest_framework (see exposition.py for the metrics endpoint).
+
+# Set by the gunicorn configuration before the workers are forked. Each worker then keeps its metrics
+# in memory mapped files in this directory, which are aggregated when the metrics are scraped.
+MULTIPROCESS_DIR = os.environ.get('prometheus_multiproc_dir')
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .075, .1, .25, .5, .75, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+WAIT_BUCKETS = (.0001, .0005, .001, .005, .01, .05, .1, .5, 1.0)
+
+
+request_latency = Histogram('api_request_duration_seconds', 'Request latency, by route and method',
+                            ('route', 'method'), buckets=LATENCY_BUCKETS)
+
+requests_total = Counter('api_requests_total', 'Requests, by route, method and status',
+                         ('route', 'method', 'status'))
+
+payload_size = Histogram('api_payload_bytes', 'Sizes of request and non-streamed response bodies, by route',
+                         ('route', 'direction'), buckets=SIZE_BUCKETS)
+
+requests_in_progress = Gauge('api_requests_in_progress', 'Requests being served, each by its own greenlet',
+                             multiprocess_mode='livesum')
+
+throttled_requests = Counter('api_throttled_requests_total', 'Throttled requests, by scope', ('scope',))
+
+search_latency = Histogram('api_search_duration_seconds', 'Search latency, by view',
+                           ('view',), buckets=LATENCY_BUCKETS)
+
+db_connections = Counter('api_db_connections_total', 'Database connections opened')
+
+redis_pool_wait = Histogram('api_redis_pool_wait_seconds', 'Time spent waiting for a free redis connection',
+                            buckets=WAIT_BUCKETS)
+
+
+@receiver(connection_created)
+def count_db_connection(sender, connection, **kwargs):
+    db_connections.inc()
+
+
+def get_route(request):
+    match = getattr(request, 'resolver_match', None)
+
+    # unmatched paths share one label value, so that they do not create a series each
+    if match is None:
+        return 'unmatched'
+
+    # the notes of a user and the notes of a notebook share their url names, so viewsets are labeled
+    # by their class and action instead
+    cls = getattr(match.func, 'cls', None)
+    actions = getattr(match.func, 'actions', None)
+    if cls is None or actions is None:
+        return match.view_name
+
+    return '%s.%s' % (cls.__name__, actions.get(request.method.lower(), 'unsupported'))
+
+
+class MetricsMiddleware(object):
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        requests_in_progress.inc()
+
+        try:
+            response = self.get_response(request)
+        finally:
+            requests_in_progress.dec()
+
+        duration = time.perf_counter() - start
+
+        route = get_route(request)
+
+        request_latency.labels(route, request.method).observe(duration)
+        requests_total.labels(route, request.method, str(response.status_code)).inc()
+
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        if content_length:
+            payload_size.labels(route, 'request').observe(content_length)
+
+        if not response.streaming:
+            payload_size.labels(route, 'response').observe(len(response.content))
+
+        return response
+
+
+def get_metrics():
+    if MULTIPROCESS_DIR is None:
+        return generate_latest(REGISTRY)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=MULTIPROCESS_DIR)
+
+    return generate_latest(registry)
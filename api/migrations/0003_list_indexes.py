@@ -0,0 +1,46 @@
+from django.db import migrations
+
+
+# (table, parent key column)
+INDEXED_TABLES = (
+    ('api_notebook', 'user_id'),
+    ('api_note', 'notebook_id'),
+    ('api_task', 'user_id'),
+)
+
+# (name suffix, columns, condition)
+# live objects are listed in creation order and synced by update time;
+# deleted objects are listed, synced and evicted by update time
+INDEX_SHAPES = (
+    ('created_live', 'created, id', 'NOT deleted'),
+    ('updated_live', 'updated, id', 'NOT deleted'),
+    ('updated_deleted', 'updated, id', 'deleted'),
+)
+
+
+def create_index_sql(table, parent_key, suffix, columns, condition):
+    return 'CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_{suffix} ON {table} ({parent_key}, {columns}) WHERE {condition};'.format(
+        table=table, parent_key=parent_key, suffix=suffix, columns=columns, condition=condition)
+
+
+def drop_index_sql(table, suffix):
+    return 'DROP INDEX CONCURRENTLY IF EXISTS {table}_{suffix};'.format(table=table, suffix=suffix)
+
+
+class Migration(migrations.Migration):
+
+    # indexes are built concurrently, which is not allowed in a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0002_trigram_ext'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=create_index_sql(table, parent_key, suffix, columns, condition),
+            reverse_sql=drop_index_sql(table, suffix)
+        )
+        for (table, parent_key) in INDEXED_TABLES
+        for (suffix, columns, condition) in INDEX_SHAPES
+    ]
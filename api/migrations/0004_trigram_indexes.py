@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+# (table, column)
+INDEXED_COLUMNS = (
+    ('api_notebook', 'name'),
+    ('api_note', 'title'),
+    ('api_note', 'text'),
+    ('api_task', 'title'),
+    ('api_task', 'description'),
+)
+
+
+def create_index_sql(table, column):
+    return 'CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_{column}_trgm ON {table} USING gin ({column} gin_trgm_ops);'.format(
+        table=table, column=column)
+
+
+def drop_index_sql(table, column):
+    return 'DROP INDEX CONCURRENTLY IF EXISTS {table}_{column}_trgm;'.format(table=table, column=column)
+
+
+class Migration(migrations.Migration):
+
+    # indexes are built concurrently, which is not allowed in a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0003_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=create_index_sql(table, column),
+            reverse_sql=drop_index_sql(table, column)
+        )
+        for (table, column) in INDEXED_COLUMNS
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+
+INDEXED_TABLES = ('api_notebook', 'api_note', 'api_task')
+
+
+def create_index_sql(table):
+    return 'CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_search_document_trgm ON {table} USING gin (search_document gin_trgm_ops);'.format(
+        table=table)
+
+
+def drop_index_sql(table):
+    return 'DROP INDEX CONCURRENTLY IF EXISTS {table}_search_document_trgm;'.format(table=table)
+
+
+class Migration(migrations.Migration):
+
+    # indexes are built concurrently, which is not allowed in a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0004_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notebook',
+            name='search_document',
+            field=models.TextField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='search_document',
+            field=models.TextField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='search_document',
+            field=models.TextField(editable=False, null=True),
+        ),
+    ] + [
+        migrations.RunSQL(
+            sql=create_index_sql(table),
+            reverse_sql=drop_index_sql(table)
+        )
+        for table in INDEXED_TABLES
+    ]
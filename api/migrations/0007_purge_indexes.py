@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+# the expired deleted objects of all parents are purged in update order
+PURGED_TABLES = (
+    'api_notebook',
+    'api_note',
+    'api_task',
+)
+
+
+def create_index_sql(table):
+    return 'CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_purge ON {table} (updated, id) WHERE deleted;'.format(
+        table=table)
+
+
+def drop_index_sql(table):
+    return 'DROP INDEX CONCURRENTLY IF EXISTS {table}_purge;'.format(table=table)
+
+
+class Migration(migrations.Migration):
+
+    # indexes are built concurrently, which is not allowed in a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0006_counts'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=create_index_sql(table),
+            reverse_sql=drop_index_sql(table)
+        )
+        for table in PURGED_TABLES
+    ]
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0007_purge_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotebookTombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ext_id', models.UUIDField(unique=True)),
+                ('updated', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, to_field='username')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NoteTombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ext_id', models.UUIDField(unique=True)),
+                ('updated', models.DateTimeField(db_index=True)),
+                ('notebook_id', models.UUIDField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, to_field='username')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ext_id', models.UUIDField(unique=True)),
+                ('updated', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, to_field='username')),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='notebooktombstone',
+            index_together=set([('user', 'updated', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='notetombstone',
+            index_together=set([('user', 'updated', 'id'), ('notebook_id', 'updated', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='tasktombstone',
+            index_together=set([('user', 'updated', 'id')]),
+        ),
+    ]
@@ -1,35 +1,67 @@
 import uuid
 
 from django.db import models
+from django.db.models import Count
 from rest_offlinesync.models import TrackedModel
 
 
 MAX_NAME_SIZE = 128
 MAX_TEXT_SIZE = 32*1024
+MAX_SEARCH_DOCUMENT_SIZE = 4*1024
 
 
-class Notebook(TrackedModel):
+def get_search_document(values):
+    return ' '.join(value for value in values if value).lower()[:MAX_SEARCH_DOCUMENT_SIZE]
+
+
+class SearchDocumentModel(models.Model):
+    search_document_fields = ()
+
+    search_document = models.TextField(null=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def update_search_document(self):
+        self.search_document = get_search_document(getattr(self, field) for field in self.search_document_fields)
+
+    def save(self, *args, **kwargs):
+        self.update_search_document()
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'search_document' not in update_fields and \
+                any(field in update_fields for field in self.search_document_fields):
+            kwargs['update_fields'] = tuple(update_fields) + ('search_document',)
+
+        super().save(*args, **kwargs)
+
+
+class Notebook(SearchDocumentModel, TrackedModel):
     ext_id = models.UUIDField(unique=True, null=False, default=uuid.uuid4)
     user = models.ForeignKey('auth.User', to_field='username')
 
     name = models.CharField(max_length=MAX_NAME_SIZE)
 
+    search_document_fields = ('name',)
+
     def __str__(self):
         return self.name
 
 
-class Note(TrackedModel):
+class Note(SearchDocumentModel, TrackedModel):
     ext_id = models.UUIDField(unique=True, null=False, default=uuid.uuid4)
     notebook = models.ForeignKey(Notebook, to_field='ext_id')
 
     title = models.CharField(max_length=MAX_NAME_SIZE)
     text = models.TextField(max_length=MAX_TEXT_SIZE)
 
+    search_document_fields = ('title', 'text')
+
     def __str__(self):
         return self.title
 
 
-class Task(TrackedModel):
+class Task(SearchDocumentModel, TrackedModel):
     ext_id = models.UUIDField(unique=True, null=False, default=uuid.uuid4)
     user = models.ForeignKey('auth.User', to_field='username')
 
@@ -37,5 +69,84 @@ class Task(TrackedModel):
     title = models.CharField(max_length=MAX_NAME_SIZE)
     description = models.TextField(null=True, max_length=MAX_TEXT_SIZE)
 
+    search_document_fields = ('title', 'description')
+
     def __str__(self):
         return self.title
+
+
+class CountsModel(models.Model):
+    # Counters of the live (not deleted) child objects of a parent, which are used to enforce the object limits.
+    # Maps each counter field to the counted model and its parent key field.
+    counted_models = {}
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_actual_counts(cls, keys):
+        counts = {key: dict.fromkeys(cls.counted_models, 0) for key in keys}
+
+        for field, (model, key_field) in cls.counted_models.items():
+            rows = model.objects.filter(**{key_field + '__in': keys, 'deleted': False})
+            rows = rows.values_list(key_field).annotate(count=Count('*')).order_by()
+
+            for key, count in rows:
+                counts[key][field] = count
+
+        return counts
+
+
+class UserCounts(CountsModel):
+    user = models.OneToOneField('auth.User', to_field='username', primary_key=True, related_name='counts')
+
+    notebooks = models.IntegerField(default=0)
+    tasks = models.IntegerField(default=0)
+
+    counted_models = {
+        'notebooks': (Notebook, 'user_id'),
+        'tasks': (Task, 'user_id'),
+    }
+
+
+class NotebookCounts(CountsModel):
+    notebook = models.OneToOneField(Notebook, to_field='ext_id', primary_key=True, related_name='counts')
+
+    notes = models.IntegerField(default=0)
+
+    counted_models = {
+        'notes': (Note, 'notebook_id'),
+    }
+
+
+class Tombstone(models.Model):
+    # The record of a deleted object, which replaces it when the API_TOMBSTONES setting is enabled,
+    # so that the tables of the tracked models and their indexes hold only live objects.
+    # It keeps what the sync endpoints report about a deletion, and the owner of the object for filtering.
+    deleted = True
+
+    ext_id = models.UUIDField(unique=True, null=False)
+    user = models.ForeignKey('auth.User', to_field='username')
+
+    updated = models.DateTimeField(db_index=True)
+
+    class Meta:
+        abstract = True
+
+
+class NotebookTombstone(Tombstone):
+    class Meta:
+        index_together = (('user', 'updated', 'id'),)
+
+
+class NoteTombstone(Tombstone):
+    # the notebook may itself be deleted, and replaced by its tombstone
+    notebook_id = models.UUIDField()
+
+    class Meta:
+        index_together = (('user', 'updated', 'id'), ('notebook_id', 'updated', 'id'))
+
+
+class TaskTombstone(Tombstone):
+    class Meta:
+        index_together = (('user', 'updated', 'id'),)
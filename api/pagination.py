@@ -1,7 +1,294 @@
+import json
+import base64
+import datetime
+import operator
+import functools
+from collections import OrderedDict
+
 from django.conf import settings
-from rest_framework.pagination import PageNumberPagination
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework import pagination, exceptions, response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+def encode_token(data):
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_token(encoded):
+    return json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+
 
+def encode_value(value):
+    return value.isoformat() if isinstance(value, datetime.datetime) else value
 
-class Pagination(PageNumberPagination):
+
+def is_streamed(view):
+    # the rows of a streamed page are returned as a queryset, to be read while the response is written
+    return getattr(view, 'streaming', False)
+
+
+class PagePagination(pagination.PageNumberPagination):
     page_size_query_param = 'size'
     max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not is_streamed(view):
+            return super().paginate_queryset(queryset, request, view)
+
+        # as in PageNumberPagination, without reading the rows
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        page_number = request.query_params.get(self.page_query_param, 1)
+        if page_number in self.last_page_strings:
+            page_number = paginator.num_pages
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise exceptions.NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        self.request = request
+        return self.page.object_list
+
+
+class KeysetPagination(pagination.BasePagination):
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    invalid_cursor_message = 'invalid cursor'
+
+    def __init__(self):
+        self.request = None
+        self.ordering = None
+        self.has_next = False
+        self.has_previous = False
+        self.first_values = None
+        self.last_values = None
+
+    @staticmethod
+    def get_ordering(queryset):
+        model = queryset.model
+        ordering = []
+
+        for expr in queryset.query.order_by:
+            if not isinstance(expr, str):
+                return None
+
+            descending = expr.startswith('-')
+            name = expr.lstrip('-')
+
+            if name in (field[0] for field in ordering):
+                continue
+
+            try:
+                field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+
+            if not field.concrete or field.is_relation or field.null:
+                return None
+
+            ordering.append((name, field, descending))
+
+        if not ordering or ordering[-1][1] is not model._meta.pk:
+            return None
+
+        return tuple(ordering)
+
+    def supports(self, queryset):
+        return self.get_ordering(queryset) is not None
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return pagination._positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+
+        return self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            cursor = decode_token(encoded)
+
+            names = tuple(name for (name, field, descending) in self.ordering)
+            if tuple(cursor['o']) != names or len(cursor['v']) != len(names):
+                raise ValueError()
+
+            values = tuple(field.to_python(value) for ((name, field, descending), value)
+                           in zip(self.ordering, cursor['v']))
+            reverse = bool(cursor['r'])
+
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise exceptions.NotFound(self.invalid_cursor_message)
+
+        return values, reverse
+
+    def encode_cursor(self, values, reverse):
+        cursor = OrderedDict((('o', [name for (name, field, descending) in self.ordering]),
+                              ('v', [encode_value(value) for value in values]),
+                              ('r', int(reverse))))
+
+        encoded = encode_token(cursor)
+
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, PagePagination.page_query_param)
+
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_values(self, obj):
+        if isinstance(obj, tuple):
+            return obj
+
+        if isinstance(obj, dict):
+            return tuple(obj[field.attname] for (name, field, descending) in self.ordering)
+
+        return tuple(getattr(obj, field.attname) for (name, field, descending) in self.ordering)
+
+    @staticmethod
+    def get_keyset_filter(ordering, values, reverse):
+        # (a, b, pk) > (x, y, z)  <=>  a >= x AND (a > x OR (a = x AND b > y) OR (a = x AND b = y AND pk > z))
+        # the leading range condition allows the database to scan an index on the first ordering field
+        conditions = []
+        equal = {}
+
+        for (name, field, descending), value in zip(ordering, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+
+            conditions.append(Q(**dict(equal, **{'%s__%s' % (name, lookup): value})))
+
+            equal[name] = value
+
+        name, field, descending = ordering[0]
+        lookup = 'lte' if descending != reverse else 'gte'
+        bound = Q(**{'%s__%s' % (name, lookup): values[0]})
+
+        return bound & functools.reduce(operator.or_, conditions)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+
+        self.ordering = self.get_ordering(queryset)
+        if self.ordering is None:
+            raise exceptions.ValidationError({self.cursor_query_param: 'unsupported sort order'})
+
+        page_size = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request)
+
+        page_queryset = queryset
+
+        if values is not None:
+            page_queryset = page_queryset.filter(self.get_keyset_filter(self.ordering, values, reverse))
+
+        if reverse:
+            page_queryset = page_queryset.order_by(*((name if descending else '-' + name)
+                                                     for (name, field, descending) in self.ordering))
+
+        streamed = is_streamed(view)
+        if streamed:
+            # only the keys are read here, and the rows are read by their primary keys while they are streamed
+            page_queryset = page_queryset.values_list(*(name for (name, field, descending) in self.ordering))
+
+        results = list(page_queryset[:page_size + 1])
+
+        has_more = len(results) > page_size
+        results = results[:page_size]
+
+        if reverse:
+            results.reverse()
+
+            self.has_next = bool(results)
+            self.has_previous = has_more
+
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None and bool(results)
+
+        self.first_values = self.get_values(results[0]) if results else None
+        self.last_values = self.get_values(results[-1]) if results else None
+
+        if streamed:
+            # the primary key is the last field of the ordering
+            return queryset.filter(pk__in=[keys[-1] for keys in results])
+
+        return results
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        return self.encode_cursor(self.last_values, False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        return self.encode_cursor(self.first_values, True)
+
+    def get_paginated_response(self, data):
+        return response.Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_results(self, data):
+        return data['results']
+
+
+# Page number pagination by default, or keyset pagination when requested with the cursor query parameter
+# or enabled with the API_KEYSET_PAGINATION setting. Keyset pagination does not count the results,
+# and fetches every page with a range scan, regardless of its depth.
+class Pagination(pagination.BasePagination):
+    def __init__(self):
+        self.page_pagination = PagePagination()
+        self.keyset_pagination = KeysetPagination()
+
+        self.pagination = self.page_pagination
+
+    @property
+    def display_page_controls(self):
+        return self.pagination.display_page_controls
+
+    def use_keyset(self, queryset, request):
+        if self.keyset_pagination.cursor_query_param in request.query_params:
+            return True
+
+        return settings.API_KEYSET_PAGINATION and self.keyset_pagination.supports(queryset)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(queryset, request):
+            self.pagination = self.keyset_pagination
+        else:
+            self.pagination = self.page_pagination
+
+        return self.pagination.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.pagination.get_paginated_response(data)
+
+    def get_results(self, data):
+        return self.pagination.get_results(data)
+
+    def to_html(self):
+        return self.pagination.to_html()
+
+    def get_schema_fields(self, view):
+        return self.page_pagination.get_schema_fields(view)
@@ -0,0 +1,87 @@
+from rest_framework import exceptions
+
+
+class FieldSelectionMixin(object):
+    # Lets read requests select the fields of the representations with the fields query parameter.
+    # Requests which select fields, or which pass the expand query parameter, receive the large fields
+    # only when they are named in either parameter, and the large columns are not read otherwise.
+    # Sync clients can thus list lightweight headers, and then fetch the bodies of the changed objects only.
+
+    fields_param = 'fields'
+    expand_param = 'expand'
+    selectable_actions = ('list', 'retrieve', 'search')
+
+    # large representation fields, which are read only when selected, mapped to their model fields
+    large_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.selected_fields = None
+
+    def get_param_names(self, request, param):
+        if param not in request.query_params:
+            return None
+
+        names = ','.join(request.query_params.getlist(param)).split(',')
+
+        return [name.strip() for name in names if name.strip()]
+
+    def get_selected_fields(self, request):
+        fields = self.get_param_names(request, self.fields_param)
+        expand = self.get_param_names(request, self.expand_param)
+
+        if fields is None and expand is None:
+            return None
+
+        available = self.get_serializer_class().Meta.fields
+
+        if fields is None:
+            fields = [name for name in available if name not in self.large_fields]
+        else:
+            unknown = [name for name in fields if name not in available]
+            if unknown:
+                raise exceptions.ValidationError({self.fields_param: 'unknown fields: ' + ', '.join(unknown)})
+
+        if expand:
+            unknown = [name for name in expand if name not in self.large_fields]
+            if unknown:
+                raise exceptions.ValidationError({self.expand_param: 'unexpandable fields: ' + ', '.join(unknown)})
+
+        # objects are always identified
+        return {'id'} | set(fields) | set(expand or ())
+
+    def get_deferred_fields(self):
+        if self.selected_fields is None:
+            return ()
+
+        return tuple(model_field for field, model_field in self.large_fields.items()
+                     if field not in self.selected_fields)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        if self.action in self.selectable_actions:
+            self.selected_fields = self.get_selected_fields(request)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        deferred = self.get_deferred_fields()
+        if deferred:
+            queryset = queryset.defer(*deferred)
+
+        return queryset
+
+    def get_compiled_columns(self):
+        deferred = self.get_deferred_fields()
+
+        return tuple(column for column in super().get_compiled_columns() if column not in deferred)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+
+        if self.selected_fields is not None:
+            context['selected_fields'] = self.selected_fields
+
+        return context
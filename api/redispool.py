@@ -0,0 +1,47 @@
+import time
+import threading
+from collections import OrderedDict
+
+from redis.connection import BlockingConnectionPool
+
+from . import metrics
+
+
+class WaitStats(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, duration):
+        with self.lock:
+            self.count += 1
+            self.total += duration
+            self.max = max(self.max, duration)
+
+    def get(self):
+        with self.lock:
+            return OrderedDict((('connections', self.count),
+                                ('wait_time_total_ms', self.total * 1000),
+                                ('wait_time_avg_ms', self.total * 1000 / self.count if self.count else None),
+                                ('wait_time_max_ms', self.max * 1000)))
+
+
+pool_wait_stats = WaitStats()
+
+
+class MeteredBlockingConnectionPool(BlockingConnectionPool):
+    # records the time spent waiting for a free connection in this process
+
+    def get_connection(self, command_name, *keys, **options):
+        start = time.perf_counter()
+
+        try:
+            return super().get_connection(command_name, *keys, **options)
+        finally:
+            duration = time.perf_counter() - start
+
+            pool_wait_stats.record(duration)
+            metrics.redis_pool_wait.observe(duration)
@@ -0,0 +1,157 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.reverse import reverse
+
+from .fields import NestedHyperlinkedIdentityField
+
+
+# Read-only serializers which build the representations of value rows directly, without field instances.
+# Their output is identical to that of the hyperlinked serializers in links.py, which must be kept in sync.
+# The large columns may be omitted from the rows, when the fields selected by the view do not include them.
+
+
+def datetime_representation(value):
+    if not value:
+        return None
+
+    # ISO 8601, as rendered by serializers.DateTimeField
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class CompiledSerializer(object):
+    columns = ()
+
+    def __init__(self, instance=None, many=False, context=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @property
+    def child(self):
+        return self
+
+    def link(self, view_name, **kwargs):
+        request = self.context.get('request')
+
+        if not NestedHyperlinkedIdentityField.url_templates or getattr(request, 'versioning_scheme', None) is not None:
+            return reverse(view_name, kwargs=kwargs, request=request)
+
+        return NestedHyperlinkedIdentityField.reverse_template(view_name, kwargs, request)
+
+    def represent(self, row):
+        raise NotImplementedError()
+
+    def to_representation(self, row):
+        representation = self.represent(row)
+
+        selected = self.context.get('selected_fields')
+        if selected is not None:
+            representation = OrderedDict((name, value) for name, value in representation.items() if name in selected)
+
+        return representation
+
+    @property
+    def data(self):
+        if self.many:
+            return [self.to_representation(row) for row in self.instance]
+
+        return self.to_representation(self.instance)
+
+
+class CompiledNotebookSerializer(CompiledSerializer):
+    columns = ('id', 'ext_id', 'user_id', 'created', 'updated', 'name')
+
+    def represent(self, row):
+        user_username = self.context['user_username']
+        ext_id = row['ext_id'].hex
+
+        links = OrderedDict((('self', self.link('notebook-detail', user_username=user_username, ext_id=ext_id)),
+                             ('user', self.link('user-detail', username=row['user_id'])),
+                             ('notes', self.link('note-list', user_username=user_username, notebook_ext_id=ext_id))))
+
+        return OrderedDict((('id', ext_id),
+                            ('user', row['user_id']),
+                            ('created', datetime_representation(row['created'])),
+                            ('updated', datetime_representation(row['updated'])),
+                            ('name', row['name']),
+                            ('links', links)))
+
+
+class CompiledNoteSerializer(CompiledSerializer):
+    columns = ('id', 'ext_id', 'notebook_id', 'created', 'updated', 'title', 'text')
+
+    def represent(self, row):
+        user_username = self.context['user_username']
+        ext_id = row['ext_id'].hex
+        notebook_ext_id = row['notebook_id'].hex
+
+        links = OrderedDict((('self', self.link('note-detail', user_username=user_username,
+                                                notebook_ext_id=notebook_ext_id, ext_id=ext_id)),
+                             ('notebook', self.link('notebook-detail', user_username=user_username,
+                                                    ext_id=notebook_ext_id))))
+
+        return OrderedDict((('id', ext_id),
+                            ('notebook', notebook_ext_id),
+                            ('created', datetime_representation(row['created'])),
+                            ('updated', datetime_representation(row['updated'])),
+                            ('title', row['title']),
+                            ('text', row.get('text')),
+                            ('links', links)))
+
+
+class CompiledTaskSerializer(CompiledSerializer):
+    columns = ('id', 'ext_id', 'user_id', 'created', 'updated', 'done', 'title', 'description')
+
+    def represent(self, row):
+        user_username = self.context['user_username']
+        ext_id = row['ext_id'].hex
+
+        links = OrderedDict((('self', self.link('task-detail', user_username=user_username, ext_id=ext_id)),
+                             ('user', self.link('user-detail', username=row['user_id']))))
+
+        return OrderedDict((('id', ext_id),
+                            ('user', row['user_id']),
+                            ('created', datetime_representation(row['created'])),
+                            ('updated', datetime_representation(row['updated'])),
+                            ('done', bool(row['done'])),
+                            ('title', row['title']),
+                            ('description', row.get('description')),
+                            ('links', links)))
+
+
+class CompiledReadMixin(object):
+    # Serves JSON list and retrieve requests from value rows of only the needed columns,
+    # through the compiled serializer of the view, when enabled with the API_COMPILED_SERIALIZERS setting.
+
+    compiled_serializer_class = None
+    compiled_actions = ('list', 'retrieve')
+
+    def is_compiled(self):
+        return settings.API_COMPILED_SERIALIZERS and \
+               self.compiled_serializer_class is not None and \
+               self.action in self.compiled_actions and \
+               not self.deleted_object and \
+               isinstance(getattr(self.request, 'accepted_renderer', None), renderers.JSONRenderer)
+
+    def get_compiled_columns(self):
+        return self.compiled_serializer_class.columns
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        if self.is_compiled():
+            queryset = queryset.values(*self.get_compiled_columns())
+
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.is_compiled():
+            kwargs['context'] = self.get_serializer_context()
+            return self.compiled_serializer_class(*args, **kwargs)
+
+        return super().get_serializer(*args, **kwargs)
@@ -1,14 +1,55 @@
 import uuid
 
 from django.core.exceptions import ObjectDoesNotExist
+from django.urls import reverse, get_urlconf, get_script_prefix
+from django.utils.http import RFC3986_SUBDELIMS, urlquote
 from rest_framework import serializers, relations
+from rest_framework.reverse import preserve_builtin_query_params
+
+
+URL_SAFE_CHARS = RFC3986_SUBDELIMS + '/~:@'
+
+
+_url_templates = {}
+
+
+def get_url_template(view_name, kwarg_names):
+    key = (get_urlconf(), get_script_prefix(), view_name, kwarg_names)
+
+    template = _url_templates.get(key)
+
+    if template is None:
+        placeholders = {kwarg: 'urlkwarg%dplaceholder' % i for (i, kwarg) in enumerate(kwarg_names)}
+
+        template = reverse(view_name, kwargs=placeholders)
+
+        for kwarg, placeholder in placeholders.items():
+            template = template.replace(placeholder, '{%s}' % kwarg)
+
+        _url_templates[key] = template
+
+    return template
+
+
+def get_url_prefix(request):
+    prefix = getattr(request, '_url_prefix', None)
+
+    if prefix is None:
+        prefix = '%s://%s' % (request.scheme, request.get_host())
+        request._url_prefix = prefix
+
+    return prefix
 
 
 class NestedHyperlinkedIdentityField(serializers.HyperlinkedIdentityField):
+    # Build urls by substituting the lookup values into a template, which is resolved once per view name,
+    # instead of running the url resolver for each link.
+    url_templates = True
+
     def __init__(self, parent_lookup=None, aux_lookup=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.parent_lookup = parent_lookup or {}
+        self.parent_lookup = parent_lookup or ()
         self.aux_lookup = aux_lookup or {}
 
     def get_url(self, obj, view_name, request, format):
@@ -17,7 +58,7 @@ class NestedHyperlinkedIdentityField(serializers.HyperlinkedIdentityField):
 
         lookup_value = getattr(obj, self.lookup_field)
         kwargs = {self.lookup_url_kwarg: lookup_value}
-        kwargs.update(self.parent_lookup)
+        kwargs.update({kwarg: self.context[kwarg] for kwarg in self.parent_lookup})
         kwargs.update({kwarg: getattr(obj, field) for (kwarg, field) in self.aux_lookup.items()})
 
         for key in kwargs:
@@ -25,18 +66,109 @@ class NestedHyperlinkedIdentityField(serializers.HyperlinkedIdentityField):
             if isinstance(value, uuid.UUID):
                 kwargs[key] = value.hex
 
-        return self.reverse(view_name, kwargs=kwargs, request=request, format=format)
+        if not self.url_templates or format is not None or getattr(request, 'versioning_scheme', None) is not None:
+            return self.reverse(view_name, kwargs=kwargs, request=request, format=format)
+
+        return self.reverse_template(view_name, kwargs, request)
+
+    @staticmethod
+    def reverse_template(view_name, kwargs, request):
+        template = get_url_template(view_name, tuple(sorted(kwargs)))
+
+        url = template.format(**{key: urlquote(value, safe=URL_SAFE_CHARS) for (key, value) in kwargs.items()})
+
+        if request is not None:
+            url = get_url_prefix(request) + url
+
+        return preserve_builtin_query_params(url, request)
+
+
+class IdentityMap(object):
+    # Caches the objects of a queryset by a secondary key for the duration of a request,
+    # and fetches the objects of many keys with one query.
+    # Locked maps lock the rows they fetch, but keep the queryset itself unlocked, because it is
+    # also evaluated outside of transactions, e.g. to list the choices of the browsable api forms.
+
+    def __init__(self, queryset, key='ext_id', lock=False):
+        self.queryset = queryset
+        self.key = key
+        self.lock = lock
+
+        self.objects = {}
+        self.missing = set()
+
+    def fetch(self, keys):
+        keys = {key for key in keys if key not in self.objects and key not in self.missing}
+        if not keys:
+            return
+
+        filter_kwargs = {self.key + '__in': keys}
+        queryset = self.queryset.select_for_update() if self.lock else self.queryset
+        found = {getattr(obj, self.key): obj for obj in queryset.filter(**filter_kwargs)}
+
+        self.objects.update(found)
+        self.missing.update(keys - set(found))
+
+    def get(self, key):
+        self.fetch((key,))
+
+        try:
+            return self.objects[key]
+        except KeyError:
+            raise ObjectDoesNotExist()
 
 
 class SecondaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, identity_map_context=None, *args, **kwargs):
         kwargs['pk_field'] = serializers.UUIDField(format='hex')
         super().__init__(*args, **kwargs)
 
+        self.identity_map_context = identity_map_context
+
+    def get_identity_map(self):
+        if self.identity_map_context is None:
+            return None
+
+        return self.context[self.identity_map_context]
+
+    def get_queryset(self):
+        identity_map = self.get_identity_map()
+        if identity_map is not None:
+            return identity_map.queryset
+
+        return super().get_queryset()
+
+    @staticmethod
+    def prefetch(identity_map, values):
+        pk_field = serializers.UUIDField(format='hex')
+
+        keys = set()
+        for value in values:
+            try:
+                keys.add(pk_field.to_internal_value(value))
+            except (serializers.ValidationError, TypeError, ValueError):
+                pass
+
+        identity_map.fetch(keys)
+
+    def prefetch_list(self, identity_map):
+        # resolves the references of all items of a list payload at once
+        data = getattr(self.root, 'initial_data', None)
+        if not isinstance(data, list):
+            return
+
+        values = (item.get(self.field_name) for item in data if isinstance(item, dict))
+        self.prefetch(identity_map, values)
+
     def to_internal_value(self, data):
         if self.pk_field is not None:
             data = self.pk_field.to_internal_value(data)
         try:
+            identity_map = self.get_identity_map()
+            if identity_map is not None:
+                self.prefetch_list(identity_map)
+                return identity_map.get(data)
+
             return self.get_queryset().get(ext_id=data)
         except ObjectDoesNotExist:
             self.fail('does_not_exist', pk_value=data)
@@ -1,9 +1,42 @@
+import copy
+
 from rest_framework import serializers
 
 from .fields import NestedHyperlinkedIdentityField, SecondaryKeyRelatedField
 from .serializers import UserSerializer, NotebookSerializer, NoteSerializer, TaskSerializer
 
 
+class CachedFieldsMixin(object):
+    # The field set of a serializer class depends only on its declaration, so it is built once per class
+    # and then cloned for every serializer instance, instead of re-introspecting the model on each request.
+    _fields_cache = {}
+
+    def get_fields(self):
+        cls = self.__class__
+
+        fields = self._fields_cache.get(cls)
+        if fields is None:
+            fields = super().get_fields()
+            self._fields_cache[cls] = fields
+
+        return copy.deepcopy(fields)
+
+
+class SelectedFieldsMixin(object):
+    # drops the fields which are not selected by the view (see projection.FieldSelectionMixin)
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        selected = self.context.get('selected_fields')
+        if selected is not None:
+            for name in list(fields):
+                if name not in selected:
+                    del fields[name]
+
+        return fields
+
+
 class UserLinksSerializer(serializers.Serializer):
     self = NestedHyperlinkedIdentityField(view_name='user-detail',
                                           lookup_field='username')
@@ -19,60 +52,54 @@ class HyperlinkedUserSerializer(UserSerializer):
         fields = UserSerializer.Meta.fields + ('links',)
 
 
-def create_hyperlinked_notebook_serializer_class(user_username):
-    class NotebookLinksSerializer(serializers.Serializer):
-        self = NestedHyperlinkedIdentityField(view_name='notebook-detail',
-                                              lookup_field='ext_id',
-                                              parent_lookup=dict(user_username=user_username))
-        user = NestedHyperlinkedIdentityField(view_name='user-detail',
-                                              lookup_url_kwarg='username', lookup_field='user_id')
-        notes = NestedHyperlinkedIdentityField(view_name='note-list',
-                                               lookup_url_kwarg='notebook_ext_id', lookup_field='ext_id',
-                                               parent_lookup=dict(user_username=user_username))
-
-    class HyperlinkedNotebookSerializer(NotebookSerializer):
-        links = NotebookLinksSerializer(read_only=True, source='*')
-
-        class Meta(NotebookSerializer.Meta):
-            fields = NotebookSerializer.Meta.fields + ('links',)
+# The nested serializers below take the parent lookup values (user_username)
+# and the notebooks identity map from the serializer context, which is populated by the view.
 
-    return HyperlinkedNotebookSerializer
+class NotebookLinksSerializer(serializers.Serializer):
+    self = NestedHyperlinkedIdentityField(view_name='notebook-detail',
+                                          lookup_field='ext_id',
+                                          parent_lookup=('user_username',))
+    user = NestedHyperlinkedIdentityField(view_name='user-detail',
+                                          lookup_url_kwarg='username', lookup_field='user_id')
+    notes = NestedHyperlinkedIdentityField(view_name='note-list',
+                                           lookup_url_kwarg='notebook_ext_id', lookup_field='ext_id',
+                                           parent_lookup=('user_username',))
 
+class HyperlinkedNotebookSerializer(SelectedFieldsMixin, CachedFieldsMixin, NotebookSerializer):
+    links = NotebookLinksSerializer(read_only=True, source='*')
 
-def create_hyperlinked_note_serializer_class(user_username, notebooks=None):
-    class NoteLinksSerializer(serializers.Serializer):
-        self = NestedHyperlinkedIdentityField(view_name='note-detail',
-                                              lookup_field='ext_id',
-                                              parent_lookup=dict(user_username=user_username),
-                                              aux_lookup=dict(notebook_ext_id='notebook_id'))
-        notebook = NestedHyperlinkedIdentityField(view_name='notebook-detail',
-                                                  lookup_url_kwarg='ext_id', lookup_field='notebook_id',
-                                                  parent_lookup=dict(user_username=user_username))
+    class Meta(NotebookSerializer.Meta):
+        fields = NotebookSerializer.Meta.fields + ('links',)
 
-    class HyperlinkedNoteSerializer(NoteSerializer):
-        if notebooks is not None:
-            notebook = SecondaryKeyRelatedField(queryset=notebooks)
 
-        links = NoteLinksSerializer(read_only=True, source='*')
+class NoteLinksSerializer(serializers.Serializer):
+    self = NestedHyperlinkedIdentityField(view_name='note-detail',
+                                          lookup_field='ext_id',
+                                          parent_lookup=('user_username',),
+                                          aux_lookup=dict(notebook_ext_id='notebook_id'))
+    notebook = NestedHyperlinkedIdentityField(view_name='notebook-detail',
+                                              lookup_url_kwarg='ext_id', lookup_field='notebook_id',
+                                              parent_lookup=('user_username',))
 
-        class Meta(NoteSerializer.Meta):
-            fields = NoteSerializer.Meta.fields + ('links',)
+class HyperlinkedNoteSerializer(SelectedFieldsMixin, CachedFieldsMixin, NoteSerializer):
+    links = NoteLinksSerializer(read_only=True, source='*')
 
-    return HyperlinkedNoteSerializer
+    class Meta(NoteSerializer.Meta):
+        fields = NoteSerializer.Meta.fields + ('links',)
 
+class HyperlinkedUserNoteSerializer(HyperlinkedNoteSerializer):
+    notebook = SecondaryKeyRelatedField(identity_map_context='notebooks')
 
-def create_hyperlinked_task_serializer_class(user_username):
-    class TaskLinksSerializer(serializers.Serializer):
-        self = NestedHyperlinkedIdentityField(view_name='task-detail',
-                                              lookup_field='ext_id',
-                                              parent_lookup=dict(user_username=user_username))
-        user = NestedHyperlinkedIdentityField(view_name='user-detail',
-                                              lookup_url_kwarg='username', lookup_field='user_id')
 
-    class HyperlinkedTaskSerializer(TaskSerializer):
-        links = TaskLinksSerializer(read_only=True, source='*')
+class TaskLinksSerializer(serializers.Serializer):
+    self = NestedHyperlinkedIdentityField(view_name='task-detail',
+                                          lookup_field='ext_id',
+                                          parent_lookup=('user_username',))
+    user = NestedHyperlinkedIdentityField(view_name='user-detail',
+                                          lookup_url_kwarg='username', lookup_field='user_id')
 
-        class Meta(TaskSerializer.Meta):
-            fields = TaskSerializer.Meta.fields + ('links',)
+class HyperlinkedTaskSerializer(SelectedFieldsMixin, CachedFieldsMixin, TaskSerializer):
+    links = TaskLinksSerializer(read_only=True, source='*')
 
-    return HyperlinkedTaskSerializer
+    class Meta(TaskSerializer.Meta):
+        fields = TaskSerializer.Meta.fields + ('links',)
@@ -1,7 +1,7 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
-from ..models import Notebook, Note, Task
+from ..models import Notebook, Note, Task, NotebookTombstone, NoteTombstone, TaskTombstone
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -35,3 +35,30 @@ class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ('id', 'user', 'created', 'updated', 'done', 'title', 'description')
+
+
+class NotebookTombstoneSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(read_only=True, source='ext_id', format='hex')
+    user = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = NotebookTombstone
+        fields = ('id', 'user', 'updated')
+
+
+class NoteTombstoneSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(read_only=True, source='ext_id', format='hex')
+    notebook = serializers.UUIDField(read_only=True, source='notebook_id', format='hex')
+
+    class Meta:
+        model = NoteTombstone
+        fields = ('id', 'notebook', 'updated')
+
+
+class TaskTombstoneSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(read_only=True, source='ext_id', format='hex')
+    user = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = TaskTombstone
+        fields = ('id', 'user', 'updated')
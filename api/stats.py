@@ -0,0 +1,26 @@
+from collections import OrderedDict
+
+from rest_framework import viewsets, mixins, permissions, response
+
+from . import caching, throttle, redispool
+
+
+class StatsViewSet(mixins.ListModelMixin,
+                   viewsets.GenericViewSet):
+    view_name = 'Stats'
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get_view_name(self):
+        return self.view_name
+
+    def list(self, request, *args, **kwargs):
+        stats = OrderedDict((('response_cache', caching.get_stats()),))
+
+        # the statistics below are of the process which serves this request
+        stats['redis_pool'] = redispool.pool_wait_stats.get()
+
+        throttle_stats = getattr(throttle.throttle_backend, 'stats', None)
+        if throttle_stats is not None:
+            stats['throttle'] = OrderedDict(throttle_stats)
+
+        return response.Response(stats)
@@ -0,0 +1,146 @@
+import json
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from rest_framework import renderers
+from rest_framework.compat import SHORT_SEPARATORS, LONG_SEPARATORS
+
+
+@contextmanager
+def snapshot():
+    # reads all queries of the block from one consistent snapshot of the database,
+    # unless the block runs within an enclosing transaction, whose isolation is kept
+    outermost = not connection.in_atomic_block
+
+    with transaction.atomic():
+        if outermost:
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY;')
+
+        yield
+
+
+class StreamedList(object):
+    # A list of objects which are serialized one by one while the response is being written,
+    # so that the representations of the whole list are never held in memory at the same time.
+    # Querysets are read through server-side cursors, so that neither are their rows.
+
+    def __init__(self, objects, serializer):
+        self.objects = objects
+        self.serializer = serializer
+
+    def __iter__(self):
+        objects = self.objects.iterator() if isinstance(self.objects, QuerySet) else self.objects
+
+        for obj in objects:
+            yield self.serializer.to_representation(obj)
+
+
+class StreamedListSerializer(object):
+    def __init__(self, serializer):
+        self.serializer = serializer
+
+    @property
+    def data(self):
+        return StreamedList(self.serializer.instance, self.serializer.child)
+
+
+class StreamingJSONRenderer(renderers.JSONRenderer):
+    chunk_size = settings.API_STREAM_CHUNK_SIZE
+
+    @property
+    def separators(self):
+        return SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+
+    def encode(self, data):
+        ret = json.dumps(data, cls=self.encoder_class, ensure_ascii=self.ensure_ascii, separators=self.separators)
+
+        return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+    def iter_parts(self, data):
+        item_separator, key_separator = self.separators
+
+        if isinstance(data, StreamedList):
+            yield '['
+            for i, item in enumerate(data):
+                yield (item_separator if i else '') + self.encode(item)
+            yield ']'
+
+        elif isinstance(data, dict):
+            yield '{'
+            for i, (key, value) in enumerate(data.items()):
+                yield (item_separator if i else '') + self.encode(str(key)) + key_separator
+                yield from self.iter_parts(value)
+            yield '}'
+
+        else:
+            yield self.encode(data)
+
+    def render_stream(self, data):
+        chunk = []
+
+        for part in self.iter_parts(data):
+            chunk.append(part)
+
+            if len(chunk) >= self.chunk_size:
+                yield ''.join(chunk).encode('utf-8')
+                chunk = []
+
+        if chunk:
+            yield ''.join(chunk).encode('utf-8')
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    renderer_class = StreamingJSONRenderer
+
+    def __init__(self, data, snapshot=False, **kwargs):
+        kwargs.setdefault('content_type', self.renderer_class.media_type)
+
+        streaming_content = self.render_snapshot(data) if snapshot else self.renderer_class().render_stream(data)
+
+        super().__init__(streaming_content, **kwargs)
+
+    def render_snapshot(self, data):
+        # reads all streamed querysets from one consistent snapshot of the database
+        with snapshot():
+            yield from self.renderer_class().render_stream(data)
+
+
+class StreamingListMixin(object):
+    # Streams the list responses of requests with the stream query parameter.
+    # The rows of the page are read, serialized and written in chunks, instead of being rendered into one body
+    # (see pagination.is_streamed). The page is read in one snapshot, but after its count or keys.
+
+    stream_param = 'stream'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.streaming = False
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+
+        if self.streaming and kwargs.get('many'):
+            serializer = StreamedListSerializer(serializer)
+
+        return serializer
+
+    def list(self, request, *args, **kwargs):
+        self.streaming = request.query_params.get(self.stream_param, '').lower() in ('1', 'true', 'yes')
+
+        response = super().list(request, *args, **kwargs)
+
+        if self.streaming:
+            streamed_response = StreamingJSONResponse(response.data, snapshot=True, status=response.status_code)
+
+            for name, value in response.items():
+                if name.lower() != 'content-type':
+                    streamed_response[name] = value
+
+            response = streamed_response
+
+        return response
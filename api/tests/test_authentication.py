@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework_jwt.settings import api_settings as jwt_settings
+
+from ..authentication import principal_cache
+
+
+class TestPrincipalCache(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user', email='user@example.com', is_staff=True)
+        self.user.set_password('password')
+        self.user.save()
+        self.url = reverse('info-list')
+
+    def test_token(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['user']['username'], self.user.username)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['user']['username'], self.user.username)
+
+        token.delete()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_jwt(self):
+        payload = jwt_settings.JWT_PAYLOAD_HANDLER(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='JWT ' + jwt_settings.JWT_ENCODE_HANDLER(payload))
+
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['user']['username'], self.user.username)
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_principal(self):
+        principal_cache.set('user', self.user.username, self.user)
+
+        self.assertEqual(principal_cache.cache.get(principal_cache.get_key('user', self.user.username)),
+                         (self.user.pk, self.user.username, True, True))
+
+        user = principal_cache.get('user', self.user.username)
+        self.assertEqual((user.pk, user.username, user.is_active, user.is_staff),
+                         (self.user.pk, self.user.username, True, True))
+        self.assertEqual((user.password, user.email), ('', ''))
@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from ..models import Notebook, Note
+
+
+class TestBatch(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('notebook-batch', kwargs={'user_username': self.user.username})
+
+    def test_create(self):
+        items = [{'action': 'create', 'data': {'name': 'notebook %d' % i}} for i in range(3)]
+        response = self.client.post(self.url, items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data['results']], [status.HTTP_201_CREATED] * 3)
+        self.assertEqual(Notebook.objects.filter(user=self.user, deleted=False).count(), 3)
+
+    def test_update_and_destroy(self):
+        notebooks = [Notebook.objects.create(user=self.user, name='notebook %d' % i) for i in range(2)]
+        items = [
+            {'action': 'partial_update', 'id': notebooks[0].ext_id.hex, 'at': notebooks[0].updated.isoformat(),
+             'data': {'name': 'renamed'}},
+            {'action': 'destroy', 'id': notebooks[1].ext_id.hex},
+        ]
+        response = self.client.post(self.url, items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(results[0]['status'], status.HTTP_200_OK)
+        self.assertEqual(results[0]['data']['name'], 'renamed')
+        self.assertEqual(results[1]['status'], status.HTTP_204_NO_CONTENT)
+        self.assertTrue(Notebook.objects.get(pk=notebooks[1].pk).deleted)
+
+    def test_item_errors(self):
+        notebook = Notebook.objects.create(user=self.user, name='notebook')
+        items = [
+            {'action': 'update', 'id': notebook.ext_id.hex, 'at': '2000-01-01T00:00:00Z', 'data': {'name': 'stale'}},
+            {'action': 'destroy', 'id': '0' * 32},
+            {'action': 'create', 'data': {}},
+            {'action': 'unknown'},
+        ]
+        response = self.client.post(self.url, items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data['results']],
+                         [status.HTTP_409_CONFLICT, status.HTTP_404_NOT_FOUND,
+                          status.HTTP_400_BAD_REQUEST, status.HTTP_400_BAD_REQUEST])
+        self.assertEqual(Notebook.objects.get(pk=notebook.pk).name, 'notebook')
+
+    def test_limits(self):
+        items = [{'action': 'create', 'data': {'name': 'notebook %d' % i}} for i in range(9)]
+        response = self.client.post(self.url, items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({result['status'] for result in response.data['results']},
+                         {status.HTTP_402_PAYMENT_REQUIRED})
+        self.assertEqual(Notebook.objects.filter(user=self.user).count(), 0)
+
+    def test_user_notes(self):
+        other = User.objects.create(username='other')
+        notebooks = [Notebook.objects.create(user=self.user, name='notebook %d' % i) for i in range(2)]
+        foreign = Notebook.objects.create(user=other, name='foreign')
+
+        url = reverse('note-batch', kwargs={'user_username': self.user.username})
+        items = [{'action': 'create', 'data': {'notebook': notebook.ext_id.hex, 'title': 'note', 'text': 'text'}}
+                 for notebook in notebooks + notebooks + [foreign]]
+        response = self.client.post(url, items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data['results']],
+                         [status.HTTP_201_CREATED] * 4 + [status.HTTP_400_BAD_REQUEST])
+        self.assertEqual(Note.objects.filter(notebook__user=self.user).count(), 4)
+        self.assertFalse(Note.objects.filter(notebook=foreign).exists())
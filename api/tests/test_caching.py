@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework import status
+
+from ..models import Notebook
+from ..caching import response_cache, get_generation_key, get_generation
+
+
+class ResponseCacheTestMixin(object):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('notebook-list', kwargs={'user_username': self.user.username})
+
+        # entries of earlier runs are keyed by the previous generation
+        response_cache.delete(get_generation_key(self.user.username))
+
+        Notebook.objects.create(user=self.user, name='notebook')
+
+
+@override_settings(API_RESPONSE_CACHE=True)
+class TestResponseCache(ResponseCacheTestMixin, APITestCase):
+
+    def test_hit(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            cached_response = self.client.get(self.url)
+
+        self.assertEqual(cached_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_response.content, response.content)
+        self.assertEqual(cached_response['ETag'], response['ETag'])
+
+
+# the generation is bumped when the write commits, which requires a transaction test case
+@override_settings(API_RESPONSE_CACHE=True)
+class TestResponseCacheInvalidation(ResponseCacheTestMixin, APITransactionTestCase):
+
+    def test_invalidation(self):
+        generation = get_generation(self.user.username)
+        self.client.get(self.url)
+
+        response = self.client.post(self.url, {'name': 'created'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertGreater(get_generation(self.user.username), generation)
+
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.json()['results']), 2)
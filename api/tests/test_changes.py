@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework import status
+
+from ..models import Notebook, Note, Task
+
+
+class TestChanges(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('change-list', kwargs={'user_username': self.user.username})
+
+    def test_pages(self):
+        notebook = Notebook.objects.create(user=self.user, name='notebook')
+        note = Note.objects.create(notebook=notebook, title='note', text='text')
+        task = Task.objects.create(user=self.user, title='task')
+        Task.objects.filter(pk=task.pk).update(deleted=True)
+
+        changes = []
+        url = self.url + '?size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            changes.extend(response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual([(change['type'], change['data']['id'], change['deleted']) for change in changes],
+                         [('notebook', notebook.ext_id.hex, False),
+                          ('note', note.ext_id.hex, False),
+                          ('task', task.ext_id.hex, True)])
+
+    def test_since(self):
+        notebook = Notebook.objects.create(user=self.user, name='notebook')
+        response = self.client.get(self.url)
+        until = response.data['until']
+
+        Note.objects.create(notebook=notebook, title='note', text='text')
+
+        response = self.client.get(self.url, {'since': until.isoformat()})
+        self.assertEqual([change['type'] for change in response.data['results']], ['note'])
+
+
+class TestChangesSnapshot(APITransactionTestCase):
+
+    def test_snapshot(self):
+        user = User.objects.create(username='user')
+        self.client.force_authenticate(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('change-list', kwargs={'user_username': user.username}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # the collections are read after the isolation of the transaction is set
+        statements = [query['sql'] for query in queries.captured_queries]
+        snapshot = statements.index('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY;')
+        reads = [i for (i, sql) in enumerate(statements) if 'FROM "api_task"' in sql]
+        self.assertTrue(reads)
+        self.assertTrue(all(i > snapshot for i in reads))
@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..models import Notebook, Note, Task
+from ..rest import links, compiled
+
+
+class TestCompiled(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='some.user+name@example.com')
+
+        notebook = Notebook.objects.create(user=self.user, name='notebook   "quoted"')
+        Note.objects.create(notebook=notebook, title='note', text='text\nwith unicode é')
+        Task.objects.create(user=self.user, title='task', done=True, description='description')
+        Task.objects.create(user=self.user, title='task', description=None)
+
+        request = Request(APIRequestFactory().get('/api/'))
+        self.context = {'request': request, 'user_username': self.user.username}
+
+    def assertIdentical(self, model, serializer_class, compiled_serializer_class):
+        queryset = model.objects.order_by('pk')
+
+        expected = serializer_class(queryset, many=True, context=self.context).data
+        actual = compiled_serializer_class(queryset.values(*compiled_serializer_class.columns), many=True,
+                                           context=self.context).data
+
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_notebook(self):
+        self.assertIdentical(Notebook, links.HyperlinkedNotebookSerializer, compiled.CompiledNotebookSerializer)
+
+    def test_note(self):
+        self.assertIdentical(Note, links.HyperlinkedNoteSerializer, compiled.CompiledNoteSerializer)
+
+    def test_task(self):
+        self.assertIdentical(Task, links.HyperlinkedTaskSerializer, compiled.CompiledTaskSerializer)
@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from ..models import Notebook
+
+
+class TestConditionalGet(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.client.force_authenticate(self.user)
+
+        self.notebooks = [Notebook.objects.create(user=self.user, name='notebook %d' % i) for i in range(2)]
+
+        kwargs = {'user_username': self.user.username}
+        self.list_url = reverse('notebook-list', kwargs=kwargs)
+        self.detail_url = reverse('notebook-detail', kwargs=dict(kwargs, ext_id=self.notebooks[0].ext_id.hex))
+
+    def test_retrieve(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        self.client.patch(self.detail_url, {'name': 'renamed'})
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'renamed')
+
+    def test_list(self):
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(self.list_url, {'size': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        Notebook.objects.filter(pk=self.notebooks[1].pk).update(deleted=True)
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils.six import StringIO
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from ..models import Notebook, Note, UserCounts, NotebookCounts
+
+
+class TestCounts(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('notebook-list', kwargs={'user_username': self.user.username})
+
+    def test_maintained(self):
+        Notebook.objects.create(user=self.user, name='existing')
+
+        response = self.client.post(self.url, {'name': 'notebook'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(UserCounts.objects.get(user=self.user).notebooks, 2)
+
+        url = reverse('notebook-detail', kwargs={'user_username': self.user.username, 'ext_id': response.data['id']})
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(UserCounts.objects.get(user=self.user).notebooks, 1)
+
+    def test_limit(self):
+        UserCounts.objects.create(user=self.user, notebooks=8)
+
+        response = self.client.post(self.url, {'name': 'notebook'})
+        self.assertEqual(response.status_code, status.HTTP_402_PAYMENT_REQUIRED)
+
+    def test_reconcile(self):
+        notebook = Notebook.objects.create(user=self.user, name='notebook')
+        Note.objects.create(notebook=notebook, title='note', text='text')
+        UserCounts.objects.create(user=self.user, notebooks=5)
+
+        call_command('reconcilecounts', sleep=0, stdout=StringIO())
+
+        self.assertEqual(UserCounts.objects.get(user=self.user).notebooks, 1)
+        self.assertEqual(NotebookCounts.objects.get(notebook=notebook).notes, 1)
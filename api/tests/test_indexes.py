@@ -0,0 +1,100 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from ..models import Notebook, Note, Task
+
+
+class TestIndexes(TestCase):
+
+    num_users = 50
+    notebooks_per_user = 4
+    notes_per_notebook = 25
+    tasks_per_user = 50
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create(User(username='user%d' % i) for i in range(cls.num_users))
+
+        notebooks = Notebook.objects.bulk_create(Notebook(user=user, name='notebook', deleted=(i == 0))
+                                                 for user in users
+                                                 for i in range(cls.notebooks_per_user))
+
+        Note.objects.bulk_create(Note(notebook=notebook, title='note', text='text', deleted=(i % 5 == 0))
+                                 for notebook in notebooks
+                                 for i in range(cls.notes_per_notebook))
+
+        Task.objects.bulk_create(Task(user=user, title='task', description='description', deleted=(i % 5 == 0))
+                                 for user in users
+                                 for i in range(cls.tasks_per_user))
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE api_notebook, api_note, api_task;')
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+
+        with connection.cursor() as cursor:
+            # the test tables are too small for the planner to prefer any index over a sequential scan,
+            # or an ordered index scan over a bitmap scan of a smaller index followed by a sort
+            cursor.execute('SET LOCAL enable_seqscan = off;')
+            cursor.execute('SET LOCAL enable_bitmapscan = off;')
+            cursor.execute('EXPLAIN ' + sql, params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+
+        return plan
+
+    def assertUsesIndex(self, queryset, *index_names):
+        plan = self.explain(queryset)
+
+        # the rows are read in the requested order from one of the list indexes, without sorting them
+        self.assertNotIn('Sort', plan)
+        self.assertTrue(any(('Index Scan using %s ' % name) in plan or ('Index Only Scan using %s ' % name) in plan
+                            for name in index_names), plan)
+
+    def test_notebook_list(self):
+        queryset = Notebook.objects.filter(user_id='user1', deleted=False).order_by('created', 'pk')[:25]
+        self.assertUsesIndex(queryset, 'api_notebook_created_live')
+
+    def test_notebook_sync(self):
+        since = timezone.now() - datetime.timedelta(hours=1)
+        queryset = Notebook.objects.filter(user_id='user1', deleted=False, updated__gte=since, updated__lt=timezone.now())
+        queryset = queryset.order_by('updated', 'pk')[:25]
+        self.assertUsesIndex(queryset, 'api_notebook_updated_live')
+
+    def test_notebook_deleted(self):
+        queryset = Notebook.objects.filter(user_id='user1', deleted=True).order_by('updated', 'pk')[:25]
+        self.assertUsesIndex(queryset, 'api_notebook_updated_deleted')
+
+    def test_note_list(self):
+        notebook = Notebook.objects.filter(user_id='user1', deleted=False).first()
+        queryset = Note.objects.filter(notebook_id=notebook.ext_id, notebook__user_id='user1',
+                                       notebook__deleted=False, deleted=False)
+        queryset = queryset.order_by('created', 'pk')[:25]
+        self.assertUsesIndex(queryset, 'api_note_created_live')
+
+    def test_note_sync(self):
+        notebook = Notebook.objects.filter(user_id='user1', deleted=False).first()
+        since = timezone.now() - datetime.timedelta(hours=1)
+        queryset = Note.objects.filter(notebook_id=notebook.ext_id, notebook__user_id='user1',
+                                       notebook__deleted=False, deleted=False,
+                                       updated__gte=since, updated__lt=timezone.now())
+        queryset = queryset.order_by('updated', 'pk')[:25]
+        self.assertUsesIndex(queryset, 'api_note_updated_live')
+
+    def test_task_list(self):
+        queryset = Task.objects.filter(user_id='user1', deleted=False).order_by('created', 'pk')[:25]
+        self.assertUsesIndex(queryset, 'api_task_created_live')
+
+    def test_task_sync(self):
+        since = timezone.now() - datetime.timedelta(hours=1)
+        queryset = Task.objects.filter(user_id='user1', deleted=False, updated__gte=since, updated__lt=timezone.now())
+        queryset = queryset.order_by('updated', 'pk')[:25]
+        self.assertUsesIndex(queryset, 'api_task_updated_live')
+
+    def test_task_deleted(self):
+        queryset = Task.objects.filter(user_id='user1', deleted=True).order_by('updated', 'pk')[:25]
+        self.assertUsesIndex(queryset, 'api_task_updated_deleted')
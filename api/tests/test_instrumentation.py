@@ -0,0 +1,65 @@
+import os
+import json
+import tempfile
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import SimpleTestCase, RequestFactory, override_settings
+
+from .. import instrumentation
+
+
+class TestInstrumentation(SimpleTestCase):
+    def tearDown(self):
+        # the middleware patches the database, cache, serializer and response classes of the process
+        instrumentation.uninstall()
+
+    def get_response(self, request):
+        instrumentation.timed('db', lambda: None)()
+        instrumentation.timed('serialize', lambda: instrumentation.timed('serialize', lambda: None)())()
+
+        return HttpResponse('{}', content_type='application/json')
+
+    @override_settings(API_SERVER_TIMING=False, API_INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            instrumentation.InstrumentationMiddleware(self.get_response)
+
+    @override_settings(API_SERVER_TIMING=True, API_INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_server_timing(self):
+        middleware = instrumentation.InstrumentationMiddleware(self.get_response)
+
+        response = middleware(RequestFactory().get('/'))
+
+        metrics = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertEqual(metrics, ['db', 'serialize', 'total'])
+        self.assertIn('desc="1 calls"', response['Server-Timing'])
+
+    def test_sampling(self):
+        fd, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        with self.settings(API_SERVER_TIMING=False, API_INSTRUMENTATION_SAMPLE_RATE=1.0, API_INSTRUMENTATION_LOG=path):
+            middleware = instrumentation.InstrumentationMiddleware(self.get_response)
+
+        response = middleware(RequestFactory().get('/'))
+        self.assertNotIn('Server-Timing', response)
+
+        with open(path) as log:
+            records = [json.loads(line) for line in log]
+
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['status'], 200)
+        self.assertEqual(records[0]['db_calls'], 1)
+        self.assertEqual(records[0]['serialize_calls'], 1)
+        self.assertEqual(records[0]['cache_calls'], 0)
+
+    def test_uninstall(self):
+        execute = instrumentation.db_utils.CursorWrapper.execute
+
+        instrumentation.install()
+        self.assertIsNot(instrumentation.db_utils.CursorWrapper.execute, execute)
+
+        instrumentation.uninstall()
+        self.assertIs(instrumentation.db_utils.CursorWrapper.execute, execute)
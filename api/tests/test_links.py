@@ -0,0 +1,46 @@
+import uuid
+
+from django.test import SimpleTestCase
+from rest_framework.reverse import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..models import Notebook, Note
+from ..rest import links
+
+
+class TestLinks(SimpleTestCase):
+
+    username = 'some.user+name@example.com'
+
+    def setUp(self):
+        self.request = Request(APIRequestFactory().get('/api/'))
+        self.context = {'request': self.request, 'user_username': self.username}
+
+    def test_notebook_links(self):
+        notebook = Notebook(pk=1, ext_id=uuid.uuid4(), user_id=self.username)
+        data = links.HyperlinkedNotebookSerializer(notebook, context=self.context).data['links']
+
+        kwargs = {'user_username': self.username, 'ext_id': notebook.ext_id.hex}
+        self.assertEqual(data['self'], reverse('notebook-detail', kwargs=kwargs, request=self.request))
+        self.assertEqual(data['user'], reverse('user-detail', args=[self.username], request=self.request))
+        kwargs = {'user_username': self.username, 'notebook_ext_id': notebook.ext_id.hex}
+        self.assertEqual(data['notes'], reverse('note-list', kwargs=kwargs, request=self.request))
+
+    def test_note_links(self):
+        note = Note(pk=1, ext_id=uuid.uuid4(), notebook_id=uuid.uuid4())
+        data = links.HyperlinkedNoteSerializer(note, context=self.context).data['links']
+
+        kwargs = {'user_username': self.username, 'notebook_ext_id': note.notebook_id.hex, 'ext_id': note.ext_id.hex}
+        self.assertEqual(data['self'], reverse('note-detail', kwargs=kwargs, request=self.request))
+        kwargs = {'user_username': self.username, 'ext_id': note.notebook_id.hex}
+        self.assertEqual(data['notebook'], reverse('notebook-detail', kwargs=kwargs, request=self.request))
+
+    def test_preserves_format_param(self):
+        request = Request(APIRequestFactory().get('/api/', {'format': 'json'}))
+        notebook = Notebook(pk=1, ext_id=uuid.uuid4(), user_id=self.username)
+        context = {'request': request, 'user_username': self.username}
+        data = links.HyperlinkedNotebookSerializer(notebook, context=context).data['links']
+
+        kwargs = {'user_username': self.username, 'ext_id': notebook.ext_id.hex}
+        self.assertEqual(data['self'], reverse('notebook-detail', kwargs=kwargs, request=request))
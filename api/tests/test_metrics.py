@@ -0,0 +1,48 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from ..models import Notebook
+
+
+@override_settings(API_METRICS_TOKEN='secret')
+class TestMetrics(APITestCase):
+
+    url = reverse('metrics-list')
+
+    def test_denies_anonymous(self):
+        response = self.client.get(self.url)
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    def test_scrape(self):
+        user = User.objects.create(username='user')
+        notebook = Notebook.objects.create(user=user, name='notebook')
+        kwargs = {'user_username': user.username}
+        self.client.force_authenticate(user)
+        self.client.get(reverse('notebook-list', kwargs=kwargs))
+        self.client.get(reverse('note-list', kwargs=kwargs))
+        self.client.get(reverse('note-list', kwargs=dict(kwargs, notebook_ext_id=notebook.ext_id.hex)))
+        self.client.force_authenticate(None)
+
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+        content = response.content.decode('utf-8')
+        self.assertIn('api_requests_total{', content)
+        self.assertIn('route="NotebookViewSet.list"', content)
+
+        # the notes of a user and of a notebook share their url names, but not their labels
+        self.assertIn('route="UserNoteViewSet.list"', content)
+        self.assertIn('route="NoteViewSet.list"', content)
+
+    def test_allows_staff(self):
+        self.client.force_authenticate(User.objects.create(username='admin', is_staff=True))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from ..models import Notebook
+from ..pagination import encode_token
+
+
+@override_settings(API_KEYSET_PAGINATION=True)
+class TestKeysetPagination(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.client.force_authenticate(self.user)
+
+        self.notebooks = [Notebook.objects.create(user=self.user, name='notebook %d' % (i % 3)) for i in range(5)]
+
+        kwargs = {'user_username': self.user.username}
+        self.url = reverse('notebook-list', kwargs=kwargs)
+        self.search_url = reverse('notebook-search', kwargs=kwargs)
+
+    def get_pages(self, url, link_name):
+        pages = []
+
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+
+            pages.append([notebook['id'] for notebook in response.data['results']])
+            url = response.data[link_name]
+
+        return pages
+
+    def test_round_trip(self):
+        pages = self.get_pages(self.url + '?size=2', 'next')
+
+        ids = [notebook.ext_id.hex for notebook in self.notebooks]
+        self.assertEqual(pages, [ids[0:2], ids[2:4], ids[4:5]])
+
+    def test_reverse(self):
+        forward = self.get_pages(self.url + '?size=2', 'next')
+
+        response = self.client.get(self.url + '?size=2')
+        response = self.client.get(response.data['next'])
+        response = self.client.get(response.data['next'])
+
+        backward = self.get_pages(response.data['previous'], 'previous')
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_sort_order(self):
+        pages = self.get_pages(self.url + '?size=2&sort=-name', 'next')
+
+        # the ties are ordered by primary key
+        ordered = sorted(self.notebooks, key=lambda notebook: notebook.name, reverse=True)
+        self.assertEqual(sum(pages, []), [notebook.ext_id.hex for notebook in ordered])
+
+    def test_unsupported_order(self):
+        # the search rank is an annotation, so searches fall back to page numbers
+        response = self.client.get(self.search_url, {'q': 'notebook', 'size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 5)
+
+        response = self.client.get(self.search_url, {'q': 'notebook', 'cursor': encode_token({})})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_malformed_cursor(self):
+        for cursor in ('garbage', encode_token({'o': ['created', 'pk'], 'v': ['garbage', 1], 'r': 0}),
+                       encode_token({'o': ['name', 'pk'], 'v': ['notebook 0', 1], 'r': 0})):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from ..models import Notebook, Note
+
+
+class TestFieldSelection(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.client.force_authenticate(self.user)
+
+        notebook = Notebook.objects.create(user=self.user, name='notebook')
+        self.note = Note.objects.create(notebook=notebook, title='note', text='large text')
+
+        self.kwargs = {'user_username': self.user.username, 'notebook_ext_id': notebook.ext_id.hex}
+        self.url = reverse('note-list', kwargs=self.kwargs)
+
+    def get_note(self, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        reads_text = any('"api_note"."text"' in query['sql'] for query in context.captured_queries)
+
+        return response.data['results'][0], reads_text
+
+    def assertSelection(self, params, keys, reads_text):
+        for compiled in (False, True):
+            with override_settings(API_COMPILED_SERIALIZERS=compiled):
+                note, actual_reads_text = self.get_note(params)
+
+                self.assertEqual(list(note), keys)
+                self.assertEqual(actual_reads_text, reads_text)
+
+    def test_default(self):
+        self.assertSelection({}, ['id', 'notebook', 'created', 'updated', 'title', 'text', 'links'], True)
+
+    def test_headers(self):
+        self.assertSelection({'expand': ''}, ['id', 'notebook', 'created', 'updated', 'title', 'links'], False)
+
+    def test_expand(self):
+        self.assertSelection({'expand': 'text'}, ['id', 'notebook', 'created', 'updated', 'title', 'text', 'links'],
+                             True)
+
+    def test_fields(self):
+        self.assertSelection({'fields': 'updated,title'}, ['id', 'updated', 'title'], False)
+        self.assertSelection({'fields': 'text'}, ['id', 'text'], True)
+
+    def test_retrieve(self):
+        url = reverse('note-detail', kwargs=dict(self.kwargs, ext_id=self.note.ext_id.hex))
+
+        response = self.client.get(url, {'fields': 'text'})
+        self.assertEqual(response.data, {'id': self.note.ext_id.hex, 'text': 'large text'})
+
+    def test_unknown(self):
+        response = self.client.get(self.url, {'fields': 'title,size'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.url, {'expand': 'title'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_write(self):
+        response = self.client.post(self.url + '?fields=title', {'title': 'new', 'text': 'new text'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['text'], 'new text')
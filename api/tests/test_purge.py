@@ -0,0 +1,58 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from ..models import Notebook, Note, Task, NotebookCounts
+
+
+class TestPurge(TestCase):
+
+    def setUp(self):
+        user = User.objects.create(username='user')
+
+        self.expired_notebook = Notebook.objects.create(user=user, name='expired', deleted=True)
+        self.live_notebook = Notebook.objects.create(user=user, name='live')
+        NotebookCounts.objects.create(notebook=self.expired_notebook, notes=2)
+        NotebookCounts.objects.create(notebook=self.live_notebook, notes=1)
+
+        # the notes of an expired notebook are purged with it, even if they are not deleted
+        Note.objects.bulk_create(Note(notebook=self.expired_notebook, title='note', text='text', deleted=(i < 3))
+                                 for i in range(5))
+
+        self.live_note = Note.objects.create(notebook=self.live_notebook, title='live', text='text')
+        self.expired_note = Note.objects.create(notebook=self.live_notebook, title='expired', text='text', deleted=True)
+        self.recent_note = Note.objects.create(notebook=self.live_notebook, title='recent', text='text', deleted=True)
+
+        self.expired_tasks = [Task.objects.create(user=user, title='expired', deleted=True) for _ in range(3)]
+        self.live_task = Task.objects.create(user=user, title='live')
+
+        expired = timezone.now() - datetime.timedelta(days=365)
+
+        Notebook.objects.filter(pk=self.expired_notebook.pk).update(updated=expired)
+        Note.objects.filter(pk=self.expired_note.pk).update(updated=expired)
+        Task.objects.filter(pk__in=[task.pk for task in self.expired_tasks]).update(updated=expired)
+        Task.objects.filter(pk=self.live_task.pk).update(updated=expired)
+
+    def test_purge(self):
+        call_command('purgedeleted', batch_size=2, sleep=0, stdout=StringIO())
+
+        self.assertQuerysetEqual(Notebook.objects.all(), [self.live_notebook.pk], lambda obj: obj.pk)
+        self.assertQuerysetEqual(NotebookCounts.objects.all(), [self.live_notebook.ext_id], lambda obj: obj.pk)
+        self.assertQuerysetEqual(Note.objects.order_by('pk'), [self.live_note.pk, self.recent_note.pk],
+                                 lambda obj: obj.pk)
+        self.assertQuerysetEqual(Task.objects.all(), [self.live_task.pk], lambda obj: obj.pk)
+
+    def test_time_limit(self):
+        out = StringIO()
+        call_command('purgedeleted', batch_size=2, sleep=0, time_limit=-1, stdout=out)
+
+        self.assertIn('time limit reached', out.getvalue())
+        self.assertTrue(Notebook.objects.filter(pk=self.expired_notebook.pk).exists())
+
+        call_command('purgedeleted', batch_size=2, sleep=0, stdout=StringIO())
+
+        self.assertFalse(Notebook.objects.filter(pk=self.expired_notebook.pk).exists())
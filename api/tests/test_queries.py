@@ -0,0 +1,76 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework import status
+
+from ..models import Notebook, Note, Task, UserCounts, NotebookCounts
+
+
+class QueryCountTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.client.force_authenticate(self.user)
+
+        self.notebook = Notebook.objects.create(user=self.user, name='notebook')
+        self.note = Note.objects.create(notebook=self.notebook, title='note', text='text')
+        self.task = Task.objects.create(user=self.user, title='task')
+
+        UserCounts.objects.create(user=self.user, notebooks=1, tasks=1)
+        NotebookCounts.objects.create(notebook=self.notebook, notes=1)
+
+    def assertRequestQueries(self, num, method, url, data=None, status_code=status.HTTP_200_OK):
+        with self.assertNumQueries(num):
+            response = getattr(self.client, method)(url, data, format='json')
+
+        self.assertEqual(response.status_code, status_code)
+
+    def assertEndpointQueries(self, name, kwargs, obj, data, counts):
+        list_url = reverse(name + '-list', kwargs=kwargs)
+        detail_url = reverse(name + '-detail', kwargs=dict(kwargs, ext_id=obj.ext_id.hex))
+
+        self.assertRequestQueries(counts['list'], 'get', list_url)
+        self.assertRequestQueries(counts['retrieve'], 'get', detail_url)
+        self.assertRequestQueries(counts['create'], 'post', list_url, data, status.HTTP_201_CREATED)
+        self.assertRequestQueries(counts['update'], 'put', detail_url, data)
+        self.assertRequestQueries(counts['destroy'], 'delete', detail_url, status_code=status.HTTP_204_NO_CONTENT)
+
+
+class TestQueryCounts(QueryCountTestCase):
+
+    def test_notebooks(self):
+        kwargs = {'user_username': self.user.username}
+        counts = {'list': 2, 'retrieve': 1, 'create': 4, 'update': 2, 'destroy': 4}
+        self.assertEndpointQueries('notebook', kwargs, self.notebook, {'name': 'renamed'}, counts)
+
+    def test_tasks(self):
+        kwargs = {'user_username': self.user.username}
+        counts = {'list': 2, 'retrieve': 1, 'create': 4, 'update': 2, 'destroy': 4}
+        self.assertEndpointQueries('task', kwargs, self.task, {'title': 'renamed'}, counts)
+
+    def test_notebook_notes(self):
+        kwargs = {'user_username': self.user.username, 'notebook_ext_id': self.notebook.ext_id.hex}
+        counts = {'list': 3, 'retrieve': 1, 'create': 4, 'update': 2, 'destroy': 4}
+        self.assertEndpointQueries('note', kwargs, self.note, {'title': 'renamed', 'text': 'text'}, counts)
+
+    def test_user_notes(self):
+        kwargs = {'user_username': self.user.username}
+        counts = {'list': 2, 'retrieve': 1, 'create': 4, 'update': 4, 'destroy': 4}
+        data = {'notebook': self.notebook.ext_id.hex, 'title': 'renamed', 'text': 'text'}
+        self.assertEndpointQueries('note', kwargs, self.note, data, counts)
+
+
+class TestBrowsableWrites(APITransactionTestCase):
+
+    def test_user_note_form(self):
+        # the browsable api lists the notebook choices after the write transaction has ended
+        user = User.objects.create(username='user')
+        notebook = Notebook.objects.create(user=user, name='notebook')
+        self.client.force_authenticate(user)
+
+        url = reverse('note-list', kwargs={'user_username': user.username})
+        data = {'notebook': notebook.ext_id.hex, 'title': 'title', 'text': 'text'}
+        response = self.client.post(url, data, HTTP_ACCEPT='text/html')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Note.objects.filter(notebook=notebook).count(), 1)
@@ -0,0 +1,47 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from ..models import Notebook, Note
+
+
+class TestTrigramSearch(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.client.force_authenticate(self.user)
+
+        notebook = Notebook.objects.create(user=self.user, name='notebook')
+        self.notes = [Note.objects.create(notebook=notebook, title='grocery list', text='milk and bread'),
+                      Note.objects.create(notebook=notebook, title='meeting', text='agenda for the grocery chain'),
+                      Note.objects.create(notebook=notebook, title='holidays', text='mountains')]
+
+        self.url = reverse('note-search', kwargs={'user_username': self.user.username})
+
+    def search(self, terms):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'q': terms})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # the candidates are selected with the indexed word similarity operator
+        self.assertTrue(any('<%' in query['sql'] for query in context.captured_queries))
+
+        return [note['id'] for note in response.data['results']]
+
+    def test_prefilter(self):
+        ids = self.search('grocery')
+
+        self.assertEqual(set(ids), {self.notes[0].ext_id.hex, self.notes[1].ext_id.hex})
+        # the match in the title ranks first
+        self.assertEqual(ids[0], self.notes[0].ext_id.hex)
+
+    def test_misspelling(self):
+        # misspellings match while their word similarity is above the threshold of pg_trgm (0.6 by default)
+        self.assertIn(self.notes[0].ext_id.hex, self.search('grocey'))
+
+    def test_no_match(self):
+        self.assertEqual(self.search('xylophone'), [])
@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from ..models import Notebook, Note, Task
+
+
+class TestSearchDocuments(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.notebook = Notebook.objects.create(user=self.user, name='Notebook')
+        self.note = Note.objects.create(notebook=self.notebook, title='Title', text='Text')
+
+    def get_document(self, obj):
+        return type(obj).objects.values_list('search_document', flat=True).get(pk=obj.pk)
+
+    def test_save(self):
+        self.assertEqual(self.get_document(self.notebook), 'notebook')
+        self.assertEqual(self.get_document(self.note), 'title text')
+
+    def test_update_fields(self):
+        self.note.title = 'Renamed'
+        self.note.save(update_fields=('title',))
+
+        self.assertEqual(self.get_document(self.note), 'renamed text')
+
+    def test_backfill(self):
+        task = Task.objects.create(user=self.user, title='Task', description=None)
+        Note.objects.update(search_document=None)
+        Task.objects.update(search_document='stale')
+        updated = Note.objects.get(pk=self.note.pk).updated
+
+        call_command('updatesearchdocuments', sleep=0, stdout=StringIO())
+
+        self.assertEqual(self.get_document(self.note), 'title text')
+        self.assertEqual(self.get_document(task), 'stale')
+        # the documents are filled in without touching the update timestamps
+        self.assertEqual(Note.objects.get(pk=self.note.pk).updated, updated)
+
+        call_command('updatesearchdocuments', all=True, batch_size=1, sleep=0, stdout=StringIO())
+
+        self.assertEqual(self.get_document(task), 'task')
+
+    def test_backfill_batch(self):
+        notes = [Note.objects.create(notebook=self.notebook, title='Note %d' % i, text='Text') for i in range(3)]
+        Note.objects.update(search_document=None)
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('updatesearchdocuments', sleep=0, stdout=StringIO())
+
+        # each batch is written with one statement
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+
+        self.assertEqual([self.get_document(note) for note in notes], ['note %d text' % i for i in range(3)])
+
+
+class TestSearchDocumentSearch(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.client.force_authenticate(self.user)
+
+        notebook = Notebook.objects.create(user=self.user, name='notebook')
+        Note.objects.create(notebook=notebook, title='grocery list', text='milk and bread')
+        Note.objects.create(notebook=notebook, title='meeting', text='agenda for the grocery chain')
+        Note.objects.create(notebook=notebook, title='holidays', text='mountains')
+
+        self.url = reverse('note-search', kwargs={'user_username': self.user.username})
+
+    def search(self, terms):
+        response = self.client.get(self.url, {'q': terms})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return {note['id'] for note in response.data['results']}
+
+    def test_same_results(self):
+        for terms in ('grocery', 'mountains', 'xylophone'):
+            with override_settings(API_SEARCH_DOCUMENTS=False):
+                expected = self.search(terms)
+
+            with override_settings(API_SEARCH_DOCUMENTS=True):
+                self.assertEqual(self.search(terms), expected)
@@ -0,0 +1,89 @@
+import json
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework.utils.urls import remove_query_param
+
+from ..models import Notebook, Note
+
+
+class TestStreaming(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.client.force_authenticate(self.user)
+
+        notebooks = [Notebook.objects.create(user=self.user, name='notebook %d' % i) for i in range(3)]
+        for notebook in notebooks:
+            Note.objects.create(notebook=notebook, title='note  ', text='text')
+
+        # the envelopes of the compared responses include the until timestamp, which defaults to the current time
+        self.until = timezone.now().isoformat()
+
+    def get_content(self, response):
+        data = json.loads(b''.join(response.streaming_content).decode('utf-8'))
+
+        # the links of streamed pages keep the stream parameter
+        for name in ('next', 'previous'):
+            if data.get(name):
+                data[name] = remove_query_param(data[name], 'stream')
+
+        return data
+
+    def get_reads(self, queries):
+        # the server side cursors of streamed rows are declared in savepoints within test cases
+        return [query['sql'] for query in queries.captured_queries if query['sql'].startswith(('SELECT', 'DECLARE'))]
+
+    def test_list_matches(self):
+        url = reverse('notebook-list', kwargs={'user_username': self.user.username})
+
+        response = self.client.get(url, {'size': 2, 'until': self.until})
+        streamed_response = self.client.get(url, {'size': 2, 'until': self.until, 'stream': 1})
+
+        self.assertEqual(streamed_response.status_code, status.HTTP_200_OK)
+        self.assertTrue(streamed_response.streaming)
+        self.assertEqual(self.get_content(streamed_response), json.loads(response.content.decode('utf-8')))
+
+    def test_rows_streamed(self):
+        url = reverse('notebook-list', kwargs={'user_username': self.user.username})
+
+        # only the count is read before the response is returned
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'stream': 1})
+        self.assertEqual(len(self.get_reads(queries)), 1, queries.captured_queries)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(self.get_content(response)['results']), 3)
+        self.assertEqual(len(self.get_reads(queries)), 1, queries.captured_queries)
+
+    @override_settings(API_KEYSET_PAGINATION=True)
+    def test_keyset_matches(self):
+        url = reverse('notebook-list', kwargs={'user_username': self.user.username})
+
+        link = url + '?' + urlencode({'size': 2, 'until': self.until})
+
+        # the first page, the next one, and then the previous one
+        for size, name in ((2, 'next'), (1, 'previous'), (2, None)):
+            data = self.get_content(self.client.get(link + '&stream=1'))
+            self.assertEqual(data, json.loads(self.client.get(link).content.decode('utf-8')))
+            self.assertEqual(len(data['results']), size)
+
+            link = data[name] if name else None
+
+    def test_export(self):
+        url = reverse('export-list', kwargs={'user_username': self.user.username})
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(b''.join(response.streaming_content).decode('utf-8'))
+        self.assertEqual(len(data['notebooks']), 3)
+        self.assertEqual(len(data['notes']), 3)
+        self.assertEqual(data['tasks'], [])
@@ -0,0 +1,95 @@
+import uuid
+
+from django.test import SimpleTestCase
+
+from ..throttle import LocalGCRA, RedisGCRA, LeasedGCRA, THROTTLE_CACHE_ALIAS
+
+
+class GCRATestMixin(object):
+    backend = None
+
+    def test_limit(self):
+        key = 'test_%s' % uuid.uuid4().hex
+        now = 1000.0
+
+        # 3 requests per 60 seconds
+        results = [self.backend.acquire(key, now, 20.0, 60.0) for _ in range(4)]
+        self.assertEqual([granted for (granted, wait) in results], [1, 1, 1, 0])
+        self.assertAlmostEqual(results[-1][1], 20.0)
+
+        self.assertFalse(self.backend.acquire(key, now + 19.0, 20.0, 60.0)[0])
+        self.assertTrue(self.backend.acquire(key, now + 20.0, 20.0, 60.0)[0])
+        self.assertFalse(self.backend.acquire(key, now + 20.0, 20.0, 60.0)[0])
+
+
+class BackendTestMixin(GCRATestMixin):
+
+    def test_release(self):
+        key = 'test_%s' % uuid.uuid4().hex
+        now = 1000.0
+
+        self.assertEqual(self.backend.acquire(key, now, 20.0, 60.0, 3)[0], 3)
+        self.assertEqual(self.backend.acquire(key, now, 20.0, 60.0)[0], 0)
+
+        self.assertEqual(self.backend.acquire(key, now, 20.0, 60.0, 3, release=2)[0], 2)
+
+
+class TestLocalGCRA(BackendTestMixin, SimpleTestCase):
+    backend = LocalGCRA()
+
+
+class TestRedisGCRA(BackendTestMixin, SimpleTestCase):
+    backend = RedisGCRA(THROTTLE_CACHE_ALIAS)
+
+
+class TestLeasedGCRA(GCRATestMixin, SimpleTestCase):
+    backend = LeasedGCRA(LocalGCRA(), 2)
+
+    def test_lease(self):
+        key = 'test_%s' % uuid.uuid4().hex
+        now = 1000.0
+
+        backend = LeasedGCRA(LocalGCRA(), 5)
+
+        # 12 requests per 60 seconds, in leases of 5
+        results = [backend.acquire(key, now, 5.0, 60.0)[0] for _ in range(13)]
+        self.assertEqual(results, [1] * 12 + [0])
+        self.assertEqual(backend.stats['leases'], 3)
+        self.assertEqual(backend.stats['local_grants'], 9)
+
+        self.assertEqual(backend.acquire(key, now + 1.0, 5.0, 60.0)[0], 0)
+        self.assertEqual(backend.stats['local_denials'], 1)
+
+    def test_lease_size(self):
+        backend = LeasedGCRA(LocalGCRA(), 10, processes=4)
+
+        # at most half of the limit is leased by all processes
+        self.assertEqual(backend.get_lease_size(1.5, 60.0), 5)
+        self.assertEqual(backend.get_lease_size(20.0, 60.0), 1)
+
+
+class TestSharedLeases(SimpleTestCase):
+    # processes which lease the requests of one key in redis
+
+    def test_bounds(self):
+        key = 'test_%s' % uuid.uuid4().hex
+        now = 1000.0
+
+        # 40 requests per 60 seconds, in leases of 5
+        interval, duration = 1.5, 60.0
+        shared = RedisGCRA(THROTTLE_CACHE_ALIAS)
+        processes = [LeasedGCRA(shared, 10, processes=4) for _ in range(4)]
+
+        for process in processes:
+            self.assertEqual(process.acquire(key, now, interval, duration)[0], 1)
+
+        # the other processes hold 4 unused requests each, which are unavailable to a busy process
+        admitted = sum(processes[0].acquire(key, now, interval, duration)[0] for _ in range(40))
+        self.assertEqual(admitted + 1, 25)
+        self.assertGreaterEqual(admitted + 1, 40 - 4 * (5 - 1))
+
+        # when the leases expire, their unused requests are released along with those emitted since
+        later = now + 5 * interval
+        admitted = sum(process.acquire(key, later, interval, duration)[0] for _ in range(10) for process in processes)
+        self.assertEqual(admitted, 5 + 3 * 4)
+        self.assertEqual(sum(process.stats['released'] for process in processes), 3 * 4)
@@ -0,0 +1,86 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from ..models import Notebook, Note, Task, UserCounts, NotebookCounts, NotebookTombstone, NoteTombstone, \
+    TaskTombstone
+
+
+@override_settings(API_TOMBSTONES=True)
+class TestTombstones(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.client.force_authenticate(self.user)
+
+        self.notebook = Notebook.objects.create(user=self.user, name='notebook')
+        self.note = Note.objects.create(notebook=self.notebook, title='note', text='text')
+
+        UserCounts.objects.create(user=self.user, notebooks=1, tasks=0)
+        NotebookCounts.objects.create(notebook=self.notebook, notes=1)
+
+        self.user_kwargs = {'user_username': self.user.username}
+        self.notebook_kwargs = dict(self.user_kwargs, notebook_ext_id=self.notebook.ext_id.hex)
+
+    def test_note(self):
+        since = timezone.now() - datetime.timedelta(minutes=1)
+
+        url = reverse('note-detail', kwargs=dict(self.notebook_kwargs, ext_id=self.note.ext_id.hex))
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertFalse(Note.objects.filter(pk=self.note.pk).exists())
+        self.assertEqual(NotebookCounts.objects.get(pk=self.notebook.ext_id).notes, 0)
+
+        tombstone = NoteTombstone.objects.get(ext_id=self.note.ext_id)
+        self.assertEqual(tombstone.notebook_id, self.notebook.ext_id)
+        self.assertEqual(tombstone.user_id, self.user.username)
+
+        for kwargs in (self.notebook_kwargs, self.user_kwargs):
+            url = reverse('note-deleted', kwargs=kwargs)
+
+            # without since, the archive may be missing expired objects
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+
+            response = self.client.get(url, {'since': since.isoformat()})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual([note['id'] for note in response.data['results']], [self.note.ext_id.hex])
+
+        response = self.client.get(reverse('change-list', kwargs=self.user_kwargs))
+        self.assertEqual([(change['type'], change['data']['id'], change['deleted'])
+                          for change in response.data['results']],
+                         [('notebook', self.notebook.ext_id.hex, False),
+                          ('note', self.note.ext_id.hex, True)])
+
+    def test_notebook(self):
+        url = reverse('notebook-detail', kwargs=dict(self.user_kwargs, ext_id=self.notebook.ext_id.hex))
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertFalse(Notebook.objects.exists())
+        self.assertFalse(Note.objects.exists())
+        self.assertFalse(NotebookCounts.objects.exists())
+        self.assertTrue(NotebookTombstone.objects.filter(ext_id=self.notebook.ext_id).exists())
+        self.assertEqual(UserCounts.objects.get(user=self.user).notebooks, 0)
+
+        response = self.client.get(reverse('notebook-deleted', kwargs=self.user_kwargs))
+        self.assertEqual([notebook['id'] for notebook in response.data['results']], [self.notebook.ext_id.hex])
+
+    def test_batch(self):
+        tasks = [Task.objects.create(user=self.user, title='task') for _ in range(2)]
+        UserCounts.objects.filter(user=self.user).update(tasks=2)
+
+        data = [{'action': 'destroy', 'id': task.ext_id.hex} for task in tasks]
+        response = self.client.post(reverse('task-batch', kwargs=self.user_kwargs), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data['results']], [204, 204])
+
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(TaskTombstone.objects.count(), 2)
+        self.assertEqual(UserCounts.objects.get(user=self.user).tasks, 0)
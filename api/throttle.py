@@ -1,6 +1,14 @@
+import math
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
 from django.core.cache import caches
+from django_redis import get_redis_connection
 from rest_framework import throttling
 
+from . import metrics
+
 
 THROTTLE_CACHE_ALIAS = 'api_throttle'
 
@@ -8,11 +16,210 @@ THROTTLE_CACHE_ALIAS = 'api_throttle'
 throttle_cache = caches[THROTTLE_CACHE_ALIAS]
 
 
-class UserRateThrottle(throttling.UserRateThrottle):
+# Generic cell rate algorithm: each request advances the theoretical arrival time (TAT) of the key by
+# the emission interval (duration / number of requests), and is admitted if the TAT does not get further
+# than the duration ahead of now. This admits bursts of up to the number of requests, like a sliding window.
+# The state of each key is a single number, which is read and written with one atomic script call.
+# A call may acquire several requests at once, and is granted as many of them as are available.
+# It may also release requests which were granted earlier but not used, by moving the TAT back.
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local duration = tonumber(ARGV[3])
+local count = tonumber(ARGV[4])
+local release = tonumber(ARGV[5])
+
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if tat then
+    tat = tat - release * interval
+end
+if not tat or tat < now then
+    tat = now
+end
+
+local available = math.floor((duration - (tat - now)) / interval + 1e-9)
+local granted = 0
+if available >= 1 then
+    granted = math.min(count, available)
+end
+
+local new_tat = tat + granted * interval
+if granted > 0 or release > 0 then
+    if new_tat > now then
+        redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+    else
+        redis.call('DEL', KEYS[1])
+    end
+end
+
+if granted < 1 then
+    return {0, tostring(tat + interval - now - duration)}
+end
+return {granted, '0'}
+"""
+
+
+class RedisGCRA(object):
+    def __init__(self, alias):
+        self.alias = alias
+
+        self.cache = caches[alias]
+        self.script = None
+
+    def acquire(self, key, now, interval, duration, count=1, release=0):
+        if self.script is None:
+            self.script = get_redis_connection(self.alias).register_script(GCRA_SCRIPT)
+
+        granted, wait = self.script(keys=[self.cache.make_key(key)],
+                                    args=[repr(now), repr(interval), repr(duration), count, release])
+
+        return int(granted), float(wait)
+
+
+class LocalGCRA(object):
+    # an in-process implementation of the same algorithm, for tests and deployments without redis
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tats = {}
+
+    def acquire(self, key, now, interval, duration, count=1, release=0):
+        with self.lock:
+            tat = max(self.tats.get(key, now) - release * interval, now)
+
+            available = math.floor((duration - (tat - now)) / interval + 1e-9)
+            if available < 1:
+                if release:
+                    self.tats[key] = tat
+                return 0, tat + interval - now - duration
+
+            granted = min(count, available)
+            self.tats[key] = tat + granted * interval
+
+            # forget the keys whose state has expired, so that the table does not grow without bounds
+            if len(self.tats) > 10000:
+                self.tats = {k: v for k, v in self.tats.items() if v > now}
+
+            return granted, 0.0
+
+
+class LeasedGCRA(object):
+    # Grants requests from allowances which are leased from another backend in blocks, so that most
+    # requests are decided without I/O. A lease expires after the time its requests take to be emitted,
+    # and its unused requests are released back with the next call of the process for the key.
+    # Until then, they are unavailable to the other processes, so the lease size is capped to a share
+    # of the limit: with P processes and leases of L requests (L <= limit / 2P), each process holds fewer
+    # than L unused requests, so a key is denied only after more than limit - P (L - 1) >= limit / 2 of
+    # its requests were admitted in the window. Leased requests may also be used up to one lease later
+    # than they were acquired, so a window admits at most limit + P L requests.
+    # Denials are also remembered until the wait time passes.
+
+    def __init__(self, backend, lease_size, processes=1):
+        self.backend = backend
+        self.lease_size = lease_size
+        self.processes = processes
+
+        self.lock = threading.Lock()
+        self.leases = {}
+        self.denials = {}
+
+        self.stats = OrderedDict((('local_grants', 0), ('local_denials', 0), ('leases', 0), ('lease_denials', 0),
+                                  ('released', 0)))
+
+    def get_lease_size(self, interval, duration):
+        limit = int(duration / interval + 1e-9)
+
+        return max(1, min(self.lease_size, limit // (2 * self.processes)))
+
+    def acquire(self, key, now, interval, duration, count=1):
+        with self.lock:
+            lease = self.leases.get(key)
+            if lease is not None and lease[1] > now and lease[0] >= count:
+                lease[0] -= count
+                self.stats['local_grants'] += 1
+                return count, 0.0
+
+            denied_until = self.denials.get(key)
+            if denied_until is not None and denied_until > now:
+                self.stats['local_denials'] += 1
+                return 0, denied_until - now
+
+            # the unused requests of an expired lease are released with the call which replaces it
+            release = self.leases.pop(key)[0] if lease is not None else 0
+            self.stats['released'] += release
+
+        lease_size = self.get_lease_size(interval, duration)
+
+        granted, wait = self.backend.acquire(key, now, interval, duration, max(lease_size, count), release)
+
+        with self.lock:
+            if len(self.leases) > 10000:
+                # the unused requests of expired leases which are forgotten are released by the passage of time
+                self.leases = {k: v for k, v in self.leases.items() if v[1] > now}
+                self.denials = {k: v for k, v in self.denials.items() if v > now}
+
+            if granted < count:
+                self.stats['lease_denials'] += 1
+                self.denials[key] = now + wait
+                return 0, wait
+
+            self.stats['leases'] += 1
+            if granted > count:
+                self.leases[key] = [granted - count, now + granted * interval]
+            self.denials.pop(key, None)
+
+            return count, 0.0
+
+
+def get_throttle_backend():
+    if settings.API_THROTTLE_BACKEND == 'local':
+        backend = LocalGCRA()
+    else:
+        backend = RedisGCRA(THROTTLE_CACHE_ALIAS)
+
+    if settings.API_THROTTLE_LEASE_SIZE > 1:
+        backend = LeasedGCRA(backend, settings.API_THROTTLE_LEASE_SIZE, settings.API_THROTTLE_PROCESSES)
+
+    return backend
+
+
+throttle_backend = get_throttle_backend()
+
+
+class GCRAThrottleMixin(object):
+    # Replaces the request history of SimpleRateThrottle, which is read, trimmed and written back on every request,
+    # with the state of the generic cell rate algorithm, using the same rates and cache keys.
+
+    backend = throttle_backend
+    cache_format = 'gcra_%(scope)s_%(ident)s'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+
+        granted, self.wait_time = self.backend.acquire(self.key, self.now,
+                                                       self.duration / self.num_requests, self.duration)
+
+        if not granted:
+            metrics.throttled_requests.labels(self.scope).inc()
+
+        return granted > 0
+
+    def wait(self):
+        return math.ceil(self.wait_time)
+
+
+class UserRateThrottle(GCRAThrottleMixin, throttling.UserRateThrottle):
     cache = throttle_cache
 
 
-class HostRateThrottle(throttling.SimpleRateThrottle):
+class HostRateThrottle(GCRAThrottleMixin, throttling.SimpleRateThrottle):
     cache = throttle_cache
     scope = 'host'
 
@@ -40,7 +40,7 @@ class TokenViewSet(AuthViewSet):
 class JWTViewSet(AuthViewSet):
     view_name = 'JWT'
     authentication_classes = tuple(cls for cls in rest_settings.DEFAULT_AUTHENTICATION_CLASSES
-                                   if cls is not JSONWebTokenAuthentication)
+                                   if not issubclass(cls, JSONWebTokenAuthentication))
 
     jwt_payload_handler = staticmethod(jwt_settings.JWT_PAYLOAD_HANDLER)
     jwt_encode_handler = staticmethod(jwt_settings.JWT_ENCODE_HANDLER)
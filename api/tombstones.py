@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.db.models import Count, Min, Subquery
+from django.utils import timezone
+
+
+class TombstoneMixin(object):
+    # Deletes objects by replacing them with tombstones (see Tombstone), when the API_TOMBSTONES setting is enabled,
+    # instead of flagging them as deleted. The archive of deleted objects is then read from the tombstones,
+    # and their number per parent is limited like that of the deleted objects.
+    # Objects which were flagged before the setting was enabled are no longer archived, but still synced as changes.
+
+    tombstone_model = None
+    tombstone_serializer_class = None
+
+    # like object_filters, for the tombstones
+    tombstone_filters = {}
+
+    # the objects which are deleted with a buried object, as (model, field referencing the object's ext_id)
+    tombstone_children = ()
+
+    def uses_tombstones(self):
+        return settings.API_TOMBSTONES and self.tombstone_model is not None
+
+    def lists_tombstones(self):
+        return self.deleted_object is True and self.uses_tombstones()
+
+    def get_tombstone_queryset(self):
+        filter_kwargs = {expr: self.kwargs[kwarg] for expr, kwarg in self.tombstone_filters.items()}
+
+        return self.tombstone_model.objects.filter(**filter_kwargs)
+
+    def get_queryset(self):
+        if not self.lists_tombstones():
+            return super().get_queryset()
+
+        queryset = self.get_tombstone_queryset()
+
+        if self.since:
+            queryset = queryset.filter(updated__gte=self.since)
+        if self.until:
+            queryset = queryset.filter(updated__lt=self.until)
+
+        return queryset
+
+    def filter_queryset(self, queryset):
+        if not self.lists_tombstones():
+            return super().filter_queryset(queryset)
+
+        # tombstones can be neither searched nor sorted
+        return queryset.order_by('updated', 'pk')
+
+    def get_tombstone(self, instance, updated):
+        tombstone = self.tombstone_model(ext_id=instance.ext_id, user_id=self.kwargs['user_username'], updated=updated)
+        setattr(tombstone, self.parent_key_filter, getattr(instance, self.parent_key_filter))
+
+        return tombstone
+
+    def bury(self, instances, now):
+        model = self.queryset.model
+
+        keys = [instance.ext_id for instance in instances]
+        for child_model, field in self.tombstone_children:
+            child_model.objects.filter(**{field + '__in': keys}).delete()
+
+        model.objects.filter(pk__in=[instance.pk for instance in instances]).delete()
+
+        self.tombstone_model.objects.bulk_create([self.get_tombstone(instance, now) for instance in instances])
+
+        self.evict_tombstones({getattr(instance, self.parent_key_filter) for instance in instances})
+
+    def evict_tombstones(self, keys):
+        limit = self.get_limit(True)
+        if not limit:
+            return
+
+        for key in keys:
+            peers = self.tombstone_model.objects.filter(**{self.parent_key_filter: key}).order_by('-updated', '-id')
+
+            self.tombstone_model.objects.filter(id__in=Subquery(peers[limit:].values('id'))).delete()
+
+    def delete_instances(self, instances):
+        now = timezone.now()
+
+        if self.uses_tombstones():
+            self.bury(instances, now)
+
+        else:
+            self.queryset.model.objects.filter(pk__in=[instance.pk for instance in instances]).update(deleted=True,
+                                                                                                      updated=now)
+
+            peers = {}
+            for instance in instances:
+                peers.setdefault(getattr(instance, self.parent_key_filter), instance)
+
+            for instance in peers.values():
+                self._evict_deleted_peers(instance)
+
+        for instance in instances:
+            instance.deleted = True
+            instance.updated = now
+
+    def perform_destroy(self, instance):
+        if not self.uses_tombstones():
+            return super().perform_destroy(instance)
+
+        self._check_write_conditions(instance)
+
+        self._ensure_updated_past(instance)
+
+        self.delete_instances([instance])
+
+    def _is_potentially_evicted(self):
+        if not self.uses_tombstones():
+            return super()._is_potentially_evicted()
+
+        limit = self.get_limit(True)
+        if not limit:
+            return False
+
+        results = self.get_tombstone_queryset().values(self.parent_key_filter)
+        results = results.annotate(ndel=Count('*'), oldest=Min('updated')).order_by()
+        results = results.filter(ndel__gte=limit)
+
+        if self.since is not None:
+            results = results.filter(oldest__gte=self.since)
+
+        return len(results) > 0
@@ -1,7 +1,7 @@
 from django.conf.urls import url, include
 from rest_framework_nested import routers
 
-from . import views, info, token
+from . import views, info, token, changes, export, stats, exposition
 
 
 root_router = routers.DefaultRouter()
@@ -12,6 +12,8 @@ user_router = routers.NestedSimpleRouter(root_router, r'users', lookup='user')
 user_router.register(r'notebooks', views.NotebookViewSet)
 user_router.register(r'notes', views.UserNoteViewSet)
 user_router.register(r'tasks', views.TaskViewSet)
+user_router.register(r'changes', changes.ChangesViewSet, base_name='change')
+user_router.register(r'export', export.ExportViewSet, base_name='export')
 
 notebook_router = routers.NestedSimpleRouter(user_router, r'notebooks', lookup='notebook')
 notebook_router.register(r'notes', views.NoteViewSet)
@@ -19,6 +21,8 @@ notebook_router.register(r'notes', views.NoteViewSet)
 root_router.register(r'info', info.ApiInfoViewSet, base_name='info')
 root_router.register(r'token', token.TokenViewSet, base_name='token')
 root_router.register(r'jwt', token.JWTViewSet, base_name='jwt')
+root_router.register(r'stats', stats.StatsViewSet, base_name='stats')
+root_router.register(r'metrics', exposition.MetricsViewSet, base_name='metrics')
 
 urlpatterns = [
     url(r'^', include(root_router.urls)),
@@ -1,11 +1,14 @@
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
 from rest_framework import viewsets, decorators
 from rest_offlinesync import limit
 from rest_fuzzysearch import sort, search
 
-from .models import Notebook, Note, Task
-from .rest import serializers, links
-from . import permissions
+from .models import Notebook, Note, Task, UserCounts, NotebookCounts, NotebookTombstone, NoteTombstone, TaskTombstone
+from .rest import serializers, links, fields, compiled
+from . import permissions, filters, batch, streaming, counters, conditional, caching, metrics, tombstones, \
+    projection
 
 
 def get_view_description(cls, html=False):
@@ -35,8 +38,16 @@ class UserViewSet(sort.SortedModelMixin,
         return queryset
 
 
-class NestedViewSet(sort.SortedModelMixin,
+class NestedViewSet(caching.ResponseCacheMixin,
+                    conditional.ConditionalGetMixin,
+                    streaming.StreamingListMixin,
+                    projection.FieldSelectionMixin,
+                    compiled.CompiledReadMixin,
+                    sort.SortedModelMixin,
                     search.SearchableModelMixin,
+                    batch.BatchModelMixin,
+                    counters.CountedModelMixin,
+                    tombstones.TombstoneMixin,
                     limit.LimitedNestedSyncedModelMixin,
                     viewsets.ModelViewSet):
     lookup_field = 'ext_id'
@@ -46,22 +57,70 @@ class NestedViewSet(sort.SortedModelMixin,
     ordering_fields = ('created', 'updated')
     ordering = ('created',)
 
-    def get_hyperlinked_serializer_class(self, username):
-        raise NotImplementedError()
+    hyperlinked_serializer_class = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.parent_cache = {}
+        self.locked_parents = {}
+
+    def get_parent(self, path, lock):
+        # each parent row is fetched at most once per request,
+        # and a locked row also serves later unlocked lookups
+        path = path and self.is_aggregate()
+        key = (path, self.deleted_parent)
+
+        parent, locked = self.parent_cache.get(key, (None, False))
+
+        if parent is None or (lock and not locked):
+            parent = super().get_parent(path, lock)
+            self.parent_cache[key] = (parent, lock)
+
+            if lock and not path:
+                self.locked_parents[parent.pk] = parent
+
+        return parent
+
+    def locked_parent(self, parent):
+        locked = self.locked_parents.get(parent.pk)
+
+        if locked is None:
+            locked = super().locked_parent(parent)
+            self.locked_parents[parent.pk] = locked
+
+        return locked
+
+    @transaction.atomic(savepoint=False)
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     def get_serializer_class(self):
-        if self.deleted_object:
+        if self.lists_tombstones():
+            return self.tombstone_serializer_class
+        elif self.deleted_object:
             return self.serializer_class
         else:
-            return self.get_hyperlinked_serializer_class(self.kwargs['user_username'])
+            return self.hyperlinked_serializer_class
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+
+        context['user_username'] = self.kwargs['user_username']
+
+        return context
 
     @decorators.list_route(suffix='Search')
     def search(self, request, *args, **kwargs):
-        self.filter_backends = (search.RankedFuzzySearchFilter, sort.OrderingFilter)
+        self.filter_backends = (filters.TrigramSearchFilter, sort.OrderingFilter)
         self.ordering_fields = ('rank',) + self.__class__.ordering_fields
         self.ordering = ('-rank',) + self.__class__.ordering
 
-        return self.list(request, *args, **kwargs)
+        if settings.API_SEARCH_DOCUMENTS:
+            self.search_fields = ('search_document',)
+
+        with metrics.search_latency.labels(type(self).__name__).time():
+            return self.list(request, *args, **kwargs)
 
 
 class UserChildViewSet(NestedViewSet):
@@ -71,30 +130,47 @@ class UserChildViewSet(NestedViewSet):
     object_filters = {'user_id': 'user_username'}
     parent_filters = {'username': 'user_username'}
     parent_key_filter = 'user_id'
+    counts_model = UserCounts
+    tombstone_filters = {'user_id': 'user_username'}
 
 
 class NotebookViewSet(UserChildViewSet):
-    queryset = Notebook.objects.all()
+    queryset = Notebook.objects.defer('search_document')
     serializer_class = serializers.NotebookSerializer
 
     search_fields = ('name',)
     ordering_fields = ('created', 'updated', 'name')
 
-    get_hyperlinked_serializer_class = staticmethod(links.create_hyperlinked_notebook_serializer_class)
+    counts_field = 'notebooks'
+
+    tombstone_model = NotebookTombstone
+    tombstone_serializer_class = serializers.NotebookTombstoneSerializer
+    tombstone_children = ((Note, 'notebook_id'), (NoteTombstone, 'notebook_id'), (NotebookCounts, 'notebook_id'))
+
+    hyperlinked_serializer_class = links.HyperlinkedNotebookSerializer
+    compiled_serializer_class = compiled.CompiledNotebookSerializer
 
 
 class TaskViewSet(UserChildViewSet):
-    queryset = Task.objects.all()
+    queryset = Task.objects.defer('search_document')
     serializer_class = serializers.TaskSerializer
 
     search_fields = ('title', 'description')
     ordering_fields = ('created', 'updated', 'done', 'title')
 
-    get_hyperlinked_serializer_class = staticmethod(links.create_hyperlinked_task_serializer_class)
+    counts_field = 'tasks'
+
+    large_fields = {'description': 'description'}
+
+    tombstone_model = TaskTombstone
+    tombstone_serializer_class = serializers.TaskTombstoneSerializer
+
+    hyperlinked_serializer_class = links.HyperlinkedTaskSerializer
+    compiled_serializer_class = compiled.CompiledTaskSerializer
 
 
 class NoteViewSet(NestedViewSet):
-    queryset = Note.objects.all()
+    queryset = Note.objects.defer('search_document')
     serializer_class = serializers.NoteSerializer
 
     search_fields = ('title', 'text')
@@ -112,19 +188,34 @@ class NoteViewSet(NestedViewSet):
         'ext_id': 'notebook_ext_id'
     }
     parent_key_filter = 'notebook_id'
+    counts_model = NotebookCounts
+    counts_field = 'notes'
 
-    get_hyperlinked_serializer_class = staticmethod(links.create_hyperlinked_note_serializer_class)
+    large_fields = {'text': 'text'}
+
+    tombstone_model = NoteTombstone
+    tombstone_serializer_class = serializers.NoteTombstoneSerializer
+    tombstone_filters = {
+        'user_id': 'user_username',
+        'notebook_id': 'notebook_ext_id'
+    }
+
+    hyperlinked_serializer_class = links.HyperlinkedNoteSerializer
+    compiled_serializer_class = compiled.CompiledNoteSerializer
 
 
 class UserNoteViewSet(NoteViewSet):
     view_name = 'Note'
 
+    hyperlinked_serializer_class = links.HyperlinkedUserNoteSerializer
+
     parent_model = Notebook
     parent_path_model = User
     safe_parent_path = True
     object_filters = {'notebook__user_id': 'user_username'}
     parent_filters = {'user_id': 'user_username'}
     parent_key_filter = 'notebook_id'
+    tombstone_filters = {'user_id': 'user_username'}
 
     def get_view_name(self):
         name = self.view_name
@@ -134,6 +225,32 @@ class UserNoteViewSet(NoteViewSet):
 
         return name
 
-    def get_hyperlinked_serializer_class(self, username):
-        notebooks = self.get_parent_queryset(False, False)
-        return links.create_hyperlinked_note_serializer_class(username, notebooks)
+    notebook_map = None
+    notebook_map_locked = False
+
+    def get_notebook_map(self):
+        if self.notebook_map is None:
+            # notebooks referenced by single object writes are locked as they are resolved
+            self.notebook_map_locked = self.action in ('create', 'update', 'partial_update')
+
+            self.notebook_map = fields.IdentityMap(self.get_parent_queryset(False, False),
+                                                   lock=self.notebook_map_locked)
+
+        return self.notebook_map
+
+    def locked_parent(self, parent):
+        if self.notebook_map_locked and self.notebook_map.objects.get(parent.ext_id) is parent:
+            return parent
+
+        return super().locked_parent(parent)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+
+        context['notebooks'] = self.get_notebook_map()
+
+        return context
+
+    def prefetch_batch_data(self, items_data):
+        values = (data.get('notebook') for data in items_data)
+        fields.SecondaryKeyRelatedField.prefetch(self.get_notebook_map(), values)
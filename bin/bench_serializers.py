@@ -0,0 +1,55 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "boomerang.settings")
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from api.models import Notebook
+from api.rest import links
+
+
+DEFAULT_ITERATIONS = 2000
+
+
+def rebuild_serializer_class(serializer_class):
+    # emulates the previous behavior of defining a new serializer class on every request
+    meta = type('Meta', (serializer_class.Meta,), {})
+    return type(serializer_class.__name__, (serializer_class,), {'Meta': meta})
+
+
+def setup_serializer(serializer_class, context):
+    serializer = serializer_class(many=True, context=context)
+    serializer.child.fields
+    serializer.child.fields['links'].fields
+    return serializer
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS
+
+    context = {
+        'request': None,
+        'user_username': 'bench',
+        'notebooks': Notebook.objects.filter(user=User(username='bench')),
+    }
+
+    serializer_classes = (links.HyperlinkedNotebookSerializer, links.HyperlinkedNoteSerializer,
+                          links.HyperlinkedUserNoteSerializer, links.HyperlinkedTaskSerializer)
+
+    for serializer_class in serializer_classes:
+        before = timeit.timeit(lambda: setup_serializer(rebuild_serializer_class(serializer_class), context),
+                               number=iterations)
+        after = timeit.timeit(lambda: setup_serializer(serializer_class, context),
+                              number=iterations)
+
+        print("%s: %.1f us/request before, %.1f us/request after" %
+              (serializer_class.__name__, before / iterations * 1e6, after / iterations * 1e6))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import time
+import timeit
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "boomerang.settings")
+import django
+django.setup()
+
+from rest_framework import throttling
+from api import throttle
+
+
+DEFAULT_ITERATIONS = 2000
+NUM_THREADS = 8
+
+
+class BenchUser(object):
+    is_authenticated = True
+
+    def __init__(self, pk):
+        self.pk = pk
+
+
+class BenchRequest(object):
+    def __init__(self, pk):
+        self.user = BenchUser(pk)
+        self.META = {}
+
+
+class HistoryRateThrottle(throttling.UserRateThrottle):
+    # the previous implementation, which keeps the request history in the cache
+    cache = throttle.throttle_cache
+
+
+def run(throttle_class, request, iterations):
+    admitted = 0
+    for _ in range(iterations):
+        admitted += throttle_class().allow_request(request, None)
+    return admitted
+
+
+def run_concurrent(throttle_class, request, iterations):
+    admitted = []
+
+    threads = [threading.Thread(target=lambda: admitted.append(run(throttle_class, request, iterations)))
+               for _ in range(NUM_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return sum(admitted)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS
+
+    throttle_classes = (('history', HistoryRateThrottle),
+                        ('gcra', throttle.UserRateThrottle))
+
+    limit = throttle.UserRateThrottle().num_requests
+
+    for index, (name, throttle_class) in enumerate(throttle_classes):
+        # the requests of each run are made by a new user, so the first ones are admitted
+        request = BenchRequest('bench-%d-%d' % (time.time(), index))
+        duration = timeit.timeit(lambda: run(throttle_class, request, 1), number=iterations)
+        print("%s: %.1f us/request" % (name, duration / iterations * 1e6))
+
+        request = BenchRequest('bench-concurrent-%d-%d' % (time.time(), index))
+        admitted = run_concurrent(throttle_class, request, iterations // NUM_THREADS)
+        print("%s: %d of %d concurrent requests admitted, limit %d" % (name, admitted, iterations, limit))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+#! /usr/bin/env python
+
+from gevent import monkey
+monkey.patch_all()
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import datetime
+import subprocess
+from collections import OrderedDict, defaultdict
+
+import gevent.pool
+import psycogreen.gevent
+import requests
+
+psycogreen.gevent.patch_psycopg()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(BASE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "boomerang.settings")
+import django
+django.setup()
+
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+from api.models import Notebook, Note
+
+
+DEFAULT_URL = 'http://localhost:8000'
+DEFAULT_USERS = 100
+DEFAULT_REQUESTS_PER_USER = 50
+DEFAULT_CONCURRENCY = 20
+DEFAULT_RESULTS_DIR = os.path.join(BASE_DIR, 'bench_results')
+
+# the relative frequencies of the synthesized operations
+DEFAULT_MIX = 'list=30,search=15,sync=25,retrieve=10,update=10,create=5,delete=5'
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore et '
+         'dolore magna aliqua').split()
+
+PERCENTILES = (50, 90, 99)
+
+# the url names of the notes of a notebook are those of the notes of a user, so they are reported as these routes
+NOTEBOOK_NOTE_LIST = 'notebook-note-list'
+NOTEBOOK_NOTE_DETAIL = 'notebook-note-detail'
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_request(route, method, path, username, params=None, data=None, ref=None):
+    request = OrderedDict((('user', username), ('route', route), ('method', method), ('path', path)))
+
+    if params:
+        request['params'] = params
+    if data is not None:
+        request['data'] = data
+    if ref is not None:
+        # the id of the created object replaces {ref} in the paths of the later requests of the user
+        request['ref'] = ref
+
+    return request
+
+
+class Synthesizer(object):
+    # Generates a trace of requests for each user, with the given mix of operations on the user's existing objects.
+    # The objects which are created are deleted by later requests, so that repeated runs keep the data set stable.
+
+    def __init__(self, rng, mix, requests_per_user):
+        self.rng = rng
+        self.requests_per_user = requests_per_user
+
+        self.operations = list(mix)
+        self.weights = [mix[operation] for operation in self.operations]
+
+    def get_trace(self, username, notebooks, notes):
+        user_kwargs = {'user_username': username}
+        created = []
+        trace = []
+
+        for index in range(self.requests_per_user):
+            operation = self.rng.choices(self.operations, self.weights)[0]
+
+            if operation in ('retrieve', 'update') and not notes or operation == 'create' and not notebooks:
+                operation = 'list'
+            if operation == 'delete' and not created:
+                operation = 'create' if notebooks else 'list'
+
+            if operation == 'list':
+                route = self.rng.choice(('notebook-list', 'note-list', 'task-list'))
+                trace.append(make_request(route, 'GET', reverse(route, kwargs=user_kwargs), username))
+
+            elif operation == 'search':
+                trace.append(make_request('note-search', 'GET', reverse('note-search', kwargs=user_kwargs), username,
+                                          params={'q': self.rng.choice(WORDS)}))
+
+            elif operation == 'sync':
+                since = timezone.now() - datetime.timedelta(seconds=self.rng.randrange(3600, 7 * 24 * 3600))
+                trace.append(make_request('change-list', 'GET', reverse('change-list', kwargs=user_kwargs), username,
+                                          params={'since': since.isoformat()}))
+
+            elif operation in ('retrieve', 'update'):
+                notebook, note = self.rng.choice(notes)
+                path = reverse('note-detail', kwargs=dict(user_kwargs, notebook_ext_id=notebook, ext_id=note))
+
+                if operation == 'retrieve':
+                    trace.append(make_request(NOTEBOOK_NOTE_DETAIL, 'GET', path, username))
+                else:
+                    trace.append(make_request(NOTEBOOK_NOTE_DETAIL, 'PATCH', path, username,
+                                              data={'title': ' '.join(self.rng.sample(WORDS, 3))}))
+
+            elif operation == 'create':
+                notebook = self.rng.choice(notebooks)
+                path = reverse('note-list', kwargs=dict(user_kwargs, notebook_ext_id=notebook))
+                ref = 'created%d' % index
+                created.append((path, ref))
+
+                trace.append(make_request(NOTEBOOK_NOTE_LIST, 'POST', path, username, ref=ref,
+                                          data={'title': ' '.join(self.rng.sample(WORDS, 3)),
+                                                'text': ' '.join(self.rng.choices(WORDS, k=50))}))
+
+            elif operation == 'delete':
+                path, ref = created.pop(self.rng.randrange(len(created)))
+                trace.append(make_request(NOTEBOOK_NOTE_DETAIL, 'DELETE', path + '{%s}/' % ref, username))
+
+        for path, ref in created:
+            trace.append(make_request(NOTEBOOK_NOTE_DETAIL, 'DELETE', path + '{%s}/' % ref, username))
+
+        return trace
+
+
+def synthesize(args):
+    rng = random.Random(args.seed)
+    mix = OrderedDict((name, float(weight)) for name, weight in (item.split('=') for item in args.mix.split(',')))
+
+    usernames = list(User.objects.filter(username__startswith=args.prefix).order_by('username')
+                     .values_list('username', flat=True)[:args.users])
+
+    notebooks = defaultdict(list)
+    for username, ext_id in Notebook.objects.filter(user_id__in=usernames, deleted=False) \
+            .order_by('id').values_list('user_id', 'ext_id'):
+        notebooks[username].append(ext_id.hex)
+
+    notes = defaultdict(list)
+    for username, notebook, ext_id in Note.objects.filter(notebook__user_id__in=usernames, deleted=False) \
+            .order_by('id').values_list('notebook__user_id', 'notebook_id', 'ext_id'):
+        notes[username].append((notebook.hex, ext_id.hex))
+
+    synthesizer = Synthesizer(rng, mix, args.requests_per_user)
+
+    return [synthesizer.get_trace(username, notebooks[username], notes[username]) for username in usernames]
+
+
+def load_trace(path):
+    traces = OrderedDict()
+
+    with open(path) as trace_file:
+        for line in trace_file:
+            if line.strip():
+                request = json.loads(line, object_pairs_hook=OrderedDict)
+                traces.setdefault(request['user'], []).append(request)
+
+    return list(traces.values())
+
+
+def save_trace(path, traces):
+    with open(path, 'w') as trace_file:
+        for trace in traces:
+            for request in trace:
+                trace_file.write(json.dumps(request) + '\n')
+
+
+def get_tokens(usernames):
+    users = User.objects.filter(username__in=usernames)
+
+    return {user.username: Token.objects.get_or_create(user=user)[0].key for user in users}
+
+
+class Runner(object):
+    def __init__(self, url, tokens, deadline):
+        self.url = url.rstrip('/')
+        self.tokens = tokens
+        self.deadline = deadline
+
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def run_trace(self, trace):
+        # the requests of a user are sent in order over one session, like those of a syncing client
+        session = requests.Session()
+        refs = {}
+
+        for request in trace:
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                break
+
+            path = request['path']
+            for ref, ext_id in refs.items():
+                path = path.replace('{%s}' % ref, ext_id)
+            if '{' in path:
+                # the object was not created
+                continue
+
+            key = '%s %s' % (request['method'], request['route'])
+            headers = {'Authorization': 'Token ' + self.tokens.get(request['user'], '')}
+
+            start = time.perf_counter()
+            try:
+                response = session.request(request['method'], self.url + path, params=request.get('params'),
+                                           json=request.get('data'), headers=headers)
+                status = response.status_code
+                content = response.content
+            except requests.RequestException:
+                status = 'error'
+                content = None
+
+            self.latencies[key].append(time.perf_counter() - start)
+            self.statuses[key][str(status)] += 1
+
+            if 'ref' in request and status == 201:
+                refs[request['ref']] = json.loads(content.decode('utf-8'))['id']
+
+
+def get_percentile(values, percentile):
+    return values[min(len(values) - 1, int(len(values) * percentile / 100))]
+
+
+def get_results(runner, elapsed, args):
+    routes = OrderedDict()
+
+    for key in sorted(runner.latencies):
+        latencies = sorted(runner.latencies[key])
+        statuses = runner.statuses[key]
+
+        route = OrderedDict((('requests', len(latencies)),
+                             ('errors', sum(count for status, count in statuses.items()
+                                            if status == 'error' or int(status) >= 400)),
+                             ('statuses', OrderedDict(sorted(statuses.items()))),
+                             ('throughput', len(latencies) / elapsed)))
+        for percentile in PERCENTILES:
+            route['p%d_ms' % percentile] = get_percentile(latencies, percentile) * 1000
+        route['max_ms'] = latencies[-1] * 1000
+
+        routes[key] = route
+
+    total = sum(route['requests'] for route in routes.values())
+
+    return OrderedDict((('commit', get_commit()),
+                        ('time', timezone.now().isoformat()),
+                        ('args', vars(args)),
+                        ('elapsed', elapsed),
+                        ('requests', total),
+                        ('errors', sum(route['errors'] for route in routes.values())),
+                        ('throughput', total / elapsed),
+                        ('routes', routes)))
+
+
+def print_results(results, baseline=None):
+    print("%d requests in %.1f s, %.1f requests/s, %d errors (commit %s)" %
+          (results['requests'], results['elapsed'], results['throughput'], results['errors'], results['commit']))
+
+    columns = ['p%d_ms' % percentile for percentile in PERCENTILES] + ['max_ms']
+
+    print("%-28s %8s %8s" % ('route', 'requests', 'errors') + ''.join(' %14s' % column for column in columns))
+
+    for key, route in results['routes'].items():
+        line = "%-28s %8d %8d" % (key, route['requests'], route['errors'])
+
+        previous = baseline['routes'].get(key) if baseline else None
+        for column in columns:
+            if previous and previous[column]:
+                line += ' %7.1f %+5.0f%%' % (route[column], (route[column] / previous[column] - 1) * 100)
+            else:
+                line += ' %14.1f' % route[column]
+
+        print(line)
+
+    if baseline:
+        print("baseline: %.1f requests/s (commit %s)" % (baseline['throughput'], baseline['commit']))
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Replays or synthesizes request traces against a running server, '
+                                                 'and reports the latency percentiles and throughput of each route.')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--trace', help='replay this JSONL trace instead of synthesizing one')
+    parser.add_argument('--record', help='save the trace to this JSONL file before running it')
+    parser.add_argument('--users', type=int, default=DEFAULT_USERS)
+    parser.add_argument('--prefix', default='user', help='prefix of the usernames, as in populate.py')
+    parser.add_argument('--requests-per-user', type=int, default=DEFAULT_REQUESTS_PER_USER)
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='users sending requests at once')
+    parser.add_argument('--duration', type=float, help='stop after this many seconds')
+    parser.add_argument('--results-dir', default=DEFAULT_RESULTS_DIR)
+    parser.add_argument('--compare', help='compare with the results in this file')
+
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    traces = load_trace(args.trace) if args.trace else synthesize(args)
+
+    if args.record:
+        save_trace(args.record, traces)
+
+    tokens = get_tokens([trace[0]['user'] for trace in traces if trace])
+
+    start = time.perf_counter()
+    runner = Runner(args.url, tokens, start + args.duration if args.duration else None)
+
+    pool = gevent.pool.Pool(args.concurrency)
+    for trace in traces:
+        pool.spawn(runner.run_trace, trace)
+    pool.join()
+
+    elapsed = time.perf_counter() - start
+
+    results = get_results(runner, elapsed, args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    print_results(results, baseline)
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, '%s-%s.json' % (time.strftime('%Y%m%d-%H%M%S'), results['commit']))
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+
+    print("results saved to %s" % path)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,5 +5,5 @@ BASE_DIR=$(dirname $(dirname $0))
 echo "clearing expired sessions"
 python $BASE_DIR/manage.py clearsessions
 
-echo "clearing expired deleted objects"
-python $BASE_DIR/manage.py cleardeleted
+echo "purging expired deleted objects"
+python $BASE_DIR/manage.py purgedeleted --time-limit 1800
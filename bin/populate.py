@@ -2,95 +2,261 @@
 
 import sys
 import os
+import io
+import csv
+import math
+import time
 import uuid
-import base64
-import threading
+import random
+import argparse
+import datetime
+import multiprocessing
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "boomerang.settings")
 import django
 django.setup()
 
-from django.db import transaction
+from django.conf import settings
+from django.db import connection, connections, transaction
 from django.contrib.auth.models import User
-from api.models import Notebook, Note, Task
+from django.utils import timezone
+from api.models import Notebook, Note, Task, UserCounts, NotebookCounts, MAX_NAME_SIZE, MAX_TEXT_SIZE, \
+    get_search_document
 
 
-DEFAULT_THREADS = 4
-DEFAULT_USERS_PER_THREAD = 2500
+DEFAULT_PROCESSES = 4
+DEFAULT_USERS = 10000
 DEFAULT_NOTEBOOKS_PER_USER = 1
 DEFAULT_NOTES_PER_NOTEBOOK = 10
 DEFAULT_TASKS_PER_USER = 10
+DEFAULT_USERS_PER_BATCH = 250
 
+# the lengths of texts are log-normally distributed, with this median and shape, and capped at the maximum size
+TEXT_MEDIAN_SIZE = 200
+TEXT_SIGMA = 1.2
 
-def create_user():
-    user = User(username=base64.b16encode(os.urandom(8)))
-    user.save()
-    return user
+# the texts are slices of a corpus of random words, which is much faster than generating each text
+CORPUS_SIZE = 4 * MAX_TEXT_SIZE
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore et '
+         'dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi aliquip ex ea '
+         'commodo consequat duis aute irure in reprehenderit voluptate velit esse cillum eu fugiat nulla '
+         'pariatur excepteur sint occaecat cupidatat non proident sunt culpa qui officia deserunt mollit anim '
+         'id est laborum').split()
 
+HISTORY_DAYS = 90
 
-def create_notebook(user):
-    notebook = Notebook(user=user, name=uuid.uuid4())
-    notebook.save()
-    return notebook
 
+def get_corpus(seed):
+    rng = random.Random(seed)
 
-def create_note(notebook):
-    note = Note(notebook=notebook, title=uuid.uuid4(),
-                text="%s %s %s %s" % (uuid.uuid4(), uuid.uuid4(), uuid.uuid4(), uuid.uuid4()))
-    note.save()
-    return note
+    words = []
+    size = 0
+    while size < CORPUS_SIZE:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
 
+    return ' '.join(words)
 
-def create_task(user):
-    task = Task(user=user, done=False, title=uuid.uuid4(), description="%s %s" % (uuid.uuid4(), uuid.uuid4()))
-    task.save()
-    return task
 
+def get_text(rng, corpus, median_size, max_size):
+    size = int(rng.lognormvariate(math.log(median_size), TEXT_SIGMA))
+    size = min(max(size, 1), max_size)
 
-class Populator(threading.Thread):
-    added_users = 0
-    added_users_lock = threading.Lock()
+    start = rng.randrange(len(corpus) - size)
 
-    def __init__(self, users, notebooks_per_user, notes_per_notebook, tasks_per_user, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    return corpus[start:start + size].strip() or 'text'
 
-        self.users = users
-        self.notebooks_per_user = notebooks_per_user
-        self.notes_per_notebook = notes_per_notebook
-        self.tasks_per_user = tasks_per_user
 
-    def run(self):
+def get_title(rng, corpus):
+    return get_text(rng, corpus, 24, MAX_NAME_SIZE)
+
+
+def get_uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def get_timestamps(rng, now):
+    created = now - datetime.timedelta(seconds=rng.randrange(HISTORY_DAYS * 24 * 3600))
+    updated = created + (now - created) * rng.random()
+
+    return created, updated
+
+
+def copy_rows(model, fields, rows):
+    # PostgreSQL COPY in CSV format; all values are quoted, because none of the generated columns is NULL
+    columns = ', '.join(connection.ops.quote_name(model._meta.get_field(field).column) for field in fields)
+    table = connection.ops.quote_name(model._meta.db_table)
+
+    data = io.StringIO()
+    csv.writer(data, quoting=csv.QUOTE_ALL).writerows(rows)
+    data.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.cursor.copy_expert('COPY %s (%s) FROM STDIN WITH (FORMAT csv)' % (table, columns), data)
+
+
+def bulk_create_rows(model, fields, rows):
+    # for other databases; the automatic timestamps are set to the current time
+    attnames = [model._meta.get_field(field).attname for field in fields]
+
+    model.objects.bulk_create([model(**dict(zip(attnames, row))) for row in rows], batch_size=1000)
+
+
+class Generator(object):
+    def __init__(self, args):
+        self.args = args
+
+        self.corpus = get_corpus(args.seed)
+        self.now = timezone.now()
+
+        self.insert_rows = copy_rows if args.method == 'copy' else bulk_create_rows
+
+        # the numbers of active and deleted children of each parent
+        self.notebooks_per_user = self.split(args.notebooks_per_user, User, Notebook)
+        self.notes_per_notebook = self.split(args.notes_per_notebook, Notebook, Note)
+        self.tasks_per_user = self.split(args.tasks_per_user, User, Task)
+
+    def split(self, count, parent_model, child_model):
+        deleted = int(round(count * self.args.deleted_ratio))
+        counts = [count - deleted, deleted]
+
+        if self.args.respect_limits:
+            limits = settings.REST_OFFLINESYNC['OBJECT_LIMITS']
+            limit = limits.get(parent_model._meta.label, {}).get(child_model._meta.label)
+
+            if limit:
+                counts = [min(value, limit[index]) if limit[index] else value for index, value in enumerate(counts)]
+
+        return counts
+
+    @staticmethod
+    def get_deleted_flags(rng, counts):
+        flags = [False] * counts[0] + [True] * counts[1]
+        rng.shuffle(flags)
+
+        return flags
+
+    def generate(self, batch):
+        # the rows of a batch depend only on the seed and the batch number, and not on the process generating them
+        rng = random.Random(self.args.seed * 1000003 + batch)
+
+        first_user = batch * self.args.batch_size
+        last_user = min(first_user + self.args.batch_size, self.args.users)
+
+        users, notebooks, notes, tasks, user_counts, notebook_counts = [], [], [], [], [], []
+
+        for index in range(first_user, last_user):
+            username = '%s%07d' % (self.args.prefix, index)
+            users.append(User(username=username, email='%s@example.com' % username,
+                              date_joined=self.now - datetime.timedelta(days=HISTORY_DAYS)))
+
+            active_notebooks = 0
+            for deleted in self.get_deleted_flags(rng, self.notebooks_per_user):
+                ext_id = get_uuid(rng)
+                name = get_title(rng, self.corpus)
+                created, updated = get_timestamps(rng, self.now)
+                notebooks.append((ext_id, username, name, get_search_document((name,)), created, updated, deleted))
+
+                active_notes = 0
+                for note_deleted in self.get_deleted_flags(rng, self.notes_per_notebook):
+                    title = get_title(rng, self.corpus)
+                    text = get_text(rng, self.corpus, TEXT_MEDIAN_SIZE, MAX_TEXT_SIZE)
+                    created, updated = get_timestamps(rng, self.now)
+                    notes.append((get_uuid(rng), ext_id, title, text, get_search_document((title, text)),
+                                  created, updated, note_deleted))
+                    active_notes += not note_deleted
+
+                notebook_counts.append((ext_id, active_notes))
+                active_notebooks += not deleted
+
+            active_tasks = 0
+            for deleted in self.get_deleted_flags(rng, self.tasks_per_user):
+                title = get_title(rng, self.corpus)
+                description = get_text(rng, self.corpus, TEXT_MEDIAN_SIZE, MAX_TEXT_SIZE)
+                created, updated = get_timestamps(rng, self.now)
+                tasks.append((get_uuid(rng), username, rng.random() < 0.3, title, description,
+                              get_search_document((title, description)), created, updated, deleted))
+                active_tasks += not deleted
+
+            user_counts.append((username, active_notebooks, active_tasks))
+
         with transaction.atomic():
-            for _ in range(self.users):
-                user = create_user()
-                for _ in range(self.notebooks_per_user):
-                    notebook = create_notebook(user)
-                    for _ in range(self.notes_per_notebook):
-                        create_note(notebook)
-                for _ in range(self.tasks_per_user):
-                    create_task(user)
-                with self.added_users_lock:
-                    self.__class__.added_users += 1
-                    added_users = self.__class__.added_users
-                    print("Added %d users, %d notebooks, %d notes, %d tasks" % \
-                          (added_users, added_users * self.notebooks_per_user,
-                           added_users * self.notebooks_per_user * self.notes_per_notebook,
-                           added_users * self.tasks_per_user))
+            User.objects.bulk_create(users)
+
+            self.insert_rows(Notebook, ('ext_id', 'user', 'name', 'search_document', 'created', 'updated', 'deleted'),
+                             notebooks)
+            self.insert_rows(Note, ('ext_id', 'notebook', 'title', 'text', 'search_document',
+                                    'created', 'updated', 'deleted'),
+                             notes)
+            self.insert_rows(Task, ('ext_id', 'user', 'done', 'title', 'description', 'search_document',
+                                    'created', 'updated', 'deleted'),
+                             tasks)
+            self.insert_rows(UserCounts, ('user', 'notebooks', 'tasks'), user_counts)
+            self.insert_rows(NotebookCounts, ('notebook', 'notes'), notebook_counts)
+
+        return len(users), len(notebooks), len(notes), len(tasks)
+
+
+generator = None
+
+
+def init_worker(args):
+    global generator
+
+    generator = Generator(args)
+
+
+def generate_batch(batch):
+    return generator.generate(batch)
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Generates users with notebooks, notes and tasks for load tests.')
+    parser.add_argument('--processes', type=int, default=DEFAULT_PROCESSES)
+    parser.add_argument('--users', type=int, default=DEFAULT_USERS)
+    parser.add_argument('--notebooks-per-user', type=int, default=DEFAULT_NOTEBOOKS_PER_USER)
+    parser.add_argument('--notes-per-notebook', type=int, default=DEFAULT_NOTES_PER_NOTEBOOK)
+    parser.add_argument('--tasks-per-user', type=int, default=DEFAULT_TASKS_PER_USER)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_USERS_PER_BATCH, help='users per transaction')
+    parser.add_argument('--deleted-ratio', type=float, default=0.0, help='fraction of objects to mark deleted')
+    parser.add_argument('--respect-limits', action='store_true', help='stay within the object limits')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--prefix', default='user', help='prefix of the usernames')
+    parser.add_argument('--method', choices=('copy', 'bulk'),
+                        default='copy' if connection.vendor == 'postgresql' else 'bulk')
+
+    return parser.parse_args()
 
 
 def main():
-    nthreads = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_THREADS
-    users_per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_USERS_PER_THREAD
-    notebooks_per_user = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_NOTEBOOKS_PER_USER
-    notes_per_notebook = int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_NOTES_PER_NOTEBOOK
-    tasks_per_user = int(sys.argv[5]) if len(sys.argv) > 5 else DEFAULT_TASKS_PER_USER
-
-    threads = [Populator(users_per_thread, notebooks_per_user, notes_per_notebook, tasks_per_user) for _ in range(nthreads)]
-    for thread in threads:
-        thread.start()
-    for thread in threads:
-        thread.join()
+    args = get_args()
+
+    nbatches = int(math.ceil(args.users / args.batch_size))
+    totals = [0, 0, 0, 0]
+    start = time.perf_counter()
+
+    # the workers open their own connections
+    connections.close_all()
+
+    if args.processes > 1:
+        pool = multiprocessing.Pool(args.processes, initializer=init_worker, initargs=(args,))
+        results = pool.imap_unordered(generate_batch, range(nbatches))
+    else:
+        pool = None
+        init_worker(args)
+        results = map(generate_batch, range(nbatches))
+
+    for counts in results:
+        totals = [total + count for total, count in zip(totals, counts)]
+        print("Added %d users, %d notebooks, %d notes, %d tasks (%.1f s)" %
+              (tuple(totals) + (time.perf_counter() - start,)))
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+
 
 if __name__ == "__main__":
     main()
@@ -63,6 +63,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.InstrumentationMiddleware',
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -211,36 +213,64 @@ LOGIN_REDIRECT_URL = 'api-root'
 ACCOUNT_LOGOUT_REDIRECT_URL = 'api-root'
 
 redis_url = urllib.parse.urlparse(os.getenv('REDIS_URL', 'redis://:honda1@localhost:6379/0'))
+redis_location = 'redis://{0}@{1}:{2}/{3}'.format(
+    ':' + redis_url.password if redis_url.password is not None else '',
+    redis_url.hostname,
+    int(redis_url.port or 6379),
+    int(redis_url.path.strip('/')) if redis_url.path else 0)
+
+redis_cache_options = {
+    'SOCKET_CONNECT_TIMEOUT': 5,
+    'SOCKET_TIMEOUT': 5,
+    'CONNECTION_POOL_CLASS': 'api.redispool.MeteredBlockingConnectionPool',
+    'CONNECTION_POOL_KWARGS': {
+        'max_connections': REDIS_MAX_CONNS // NUM_PROCS,
+        'timeout': 5,
+    },
+}
 
+# the redis caches share one connection pool, because they have the same location
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     },
     'api_throttle': {
         'BACKEND': 'django_redis.cache.RedisCache',
-        'LOCATION': 'redis://{0}@{1}:{2}/{3}'.format(
-            ':' + redis_url.password if redis_url.password is not None else '',
-            redis_url.hostname,
-            int(redis_url.port or 6379),
-            int(redis_url.path.strip('/')) if redis_url.path else 0),
+        'LOCATION': redis_location,
         'TIMEOUT': 300,
         'KEY_PREFIX': 'boomerang',
-        'OPTIONS': {
-            'SOCKET_CONNECT_TIMEOUT': 5,
-            'SOCKET_TIMEOUT': 5,
-            'CONNECTION_POOL_CLASS': 'redis.connection.BlockingConnectionPool',
-            'CONNECTION_POOL_CLASS_KWARGS': {
-                'max_connections': REDIS_MAX_CONNS // NUM_PROCS,
-                'timeout': 5,
-            },
-        },
-    }
+        'OPTIONS': redis_cache_options,
+    },
+    'api_responses': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': redis_location,
+        'TIMEOUT': 300,
+        'KEY_PREFIX': 'boomerang',
+        'OPTIONS': dict(redis_cache_options, COMPRESSOR='django_redis.compressors.zlib.ZlibCompressor'),
+    },
+    'api_auth': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': redis_location,
+        'TIMEOUT': 60,
+        'KEY_PREFIX': 'boomerang',
+        'OPTIONS': redis_cache_options,
+    },
 }
 
+# without redis (e.g. for offline benchmarks), the api caches are per process
+LOCMEM_CACHES = os.getenv('LOCMEM_CACHES', '').lower() in ('1', 'true', 'yes')
+if LOCMEM_CACHES:
+    for alias in ('api_throttle', 'api_responses', 'api_auth'):
+        CACHES[alias] = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': alias,
+            'TIMEOUT': CACHES[alias]['TIMEOUT'],
+        }
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
-        'rest_framework_jwt.authentication.JSONWebTokenAuthentication',
+        'api.authentication.TokenAuthentication',
+        'api.authentication.JSONWebTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ),
@@ -254,7 +284,7 @@ REST_FRAMEWORK = {
         # 'api.throttle.HostRateThrottle',
     ),
     'DEFAULT_THROTTLE_RATES': {
-        'user': '120/min',
+        'user': os.getenv('API_USER_THROTTLE_RATE', '120/min'),
         'host': '120/min',
     },
     'VIEW_DESCRIPTION_FUNCTION': 'api.views.get_view_description',
@@ -295,6 +325,21 @@ REST_OFFLINESYNC = {
 
 
 API_MAX_PAGE_SIZE = 100
+API_MAX_BATCH_SIZE = 100
+API_STREAM_CHUNK_SIZE = 100
+API_KEYSET_PAGINATION = os.getenv('API_KEYSET_PAGINATION', '').lower() in ('1', 'true', 'yes')
+API_SEARCH_DOCUMENTS = os.getenv('API_SEARCH_DOCUMENTS', '').lower() in ('1', 'true', 'yes')
+API_COMPILED_SERIALIZERS = os.getenv('API_COMPILED_SERIALIZERS', '').lower() in ('1', 'true', 'yes')
+API_RESPONSE_CACHE = os.getenv('API_RESPONSE_CACHE', '').lower() in ('1', 'true', 'yes')
+API_TOMBSTONES = os.getenv('API_TOMBSTONES', '').lower() in ('1', 'true', 'yes')
+API_AUTH_LOCAL_CACHE_TIMEOUT = 5
+API_THROTTLE_BACKEND = os.getenv('API_THROTTLE_BACKEND', 'local' if LOCMEM_CACHES else 'redis')
+API_THROTTLE_LEASE_SIZE = int(os.getenv('API_THROTTLE_LEASE_SIZE', 0))
+API_THROTTLE_PROCESSES = NUM_PROCS
+API_SERVER_TIMING = os.getenv('API_SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+API_INSTRUMENTATION_SAMPLE_RATE = float(os.getenv('API_INSTRUMENTATION_SAMPLE_RATE', 0))
+API_INSTRUMENTATION_LOG = os.getenv('API_INSTRUMENTATION_LOG', os.path.join(BASE_DIR, 'instrumentation.jsonl'))
+API_METRICS_TOKEN = os.getenv('API_METRICS_TOKEN')
 
 
 CORS_ALLOW_CREDENTIALS = True
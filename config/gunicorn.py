@@ -1,9 +1,20 @@
 import os
+import shutil
+import tempfile
 from pathlib import Path
 
 import psycogreen.gevent
 
 
+# the metrics of the workers are kept in files in this directory, and it must be set before the application is loaded
+metrics_dir = os.environ.setdefault('prometheus_multiproc_dir', os.path.join(tempfile.gettempdir(), 'boomerang-metrics'))
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
 def when_ready(server):
     Path('/tmp/app-initialized').touch()
 
@@ -12,6 +23,12 @@ def post_fork(server, worker):
     psycogreen.gevent.patch_psycopg()
 
 
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid, metrics_dir)
+
+
 bind = os.environ['PORT']
 if bind.startswith('/'):
     bind = 'unix:' + bind